@@ -0,0 +1,100 @@
+"""Measure live ingest throughput with and without group commits.
+
+Posts lap times for a full grid, one request per lap as a live timing feed
+would, and reports the rate at which they are written to a fresh SQLite
+database. The baseline writes every record in its own transaction.
+
+Run from the project root:
+
+    uv run python benchmarks/ingest.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+CARS = 20
+LAPS = 500
+
+PROBE = """
+import json
+import sys
+import time
+
+from fastapi.testclient import TestClient
+
+from src.main import app
+
+cars, laps = int(sys.argv[1]), int(sys.argv[2])
+
+with TestClient(app) as client:
+    client.post("/api/v1/circuits", json={
+        "circuit_ref": "bench", "name": "Bench", "location": "Bench",
+        "country": "Bench",
+    })
+    client.post("/api/v1/races", json={
+        "year": 2024, "round": 1, "circuit_id": 1, "name": "Bench GP",
+    })
+    for car in range(1, cars + 1):
+        client.post("/api/v1/drivers", json={
+            "driver_ref": f"bench{car}", "forename": "Bench",
+            "surname": str(car), "nationality": "Bench",
+        })
+
+    started = time.perf_counter()
+    rejected = 0
+    for lap in range(1, laps + 1):
+        records = [
+            {"race_id": 1, "driver_id": car, "lap": lap, "position": car,
+             "time": "1:30.000"}
+            for car in range(1, cars + 1)
+        ]
+        response = client.post("/api/v1/ingest/laps", json=records)
+        while response.status_code == 503:
+            rejected += 1
+            time.sleep(0.01)
+            response = client.post("/api/v1/ingest/laps", json=records)
+    while client.get("/metrics/ingest").json()["written"] < cars * laps:
+        time.sleep(0.001)
+    elapsed = time.perf_counter() - started
+    stats = client.get("/metrics/ingest").json()
+
+print(json.dumps({
+    "records_per_second": cars * laps / elapsed,
+    "batches": stats["batches"],
+    "rejected_requests": rejected,
+}))
+"""
+
+
+def measure(batch_size: int | None) -> dict:
+    """Run the ingest probe against a fresh database."""
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{directory}/f1.db")
+        if batch_size is not None:
+            env["INGEST_BATCH_SIZE"] = str(batch_size)
+        output = subprocess.run(  # noqa: S603
+            [sys.executable, "-c", PROBE, str(CARS), str(LAPS)],
+            capture_output=True,
+            check=True,
+            env=env,
+            text=True,
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    """Compare one commit per record with group commits."""
+    for name, batch_size in (("per record", 1), ("group commit", None)):
+        sample = measure(batch_size)
+        print(
+            f"{name}: {sample['records_per_second']:.0f} records/s "
+            f"in {sample['batches']} commits, "
+            f"{sample['rejected_requests']} requests rejected",
+        )
+
+
+if __name__ == "__main__":
+    main()
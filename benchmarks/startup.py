@@ -0,0 +1,64 @@
+"""Measure API cold start: import time and time-to-first-request.
+
+Run from the project root:
+
+    uv run python benchmarks/startup.py
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+RUNS = 5
+
+PROBE = """
+import json
+import time
+
+started = time.perf_counter()
+from src.main import app
+imported = time.perf_counter()
+
+from fastapi.testclient import TestClient
+
+with TestClient(app) as client:
+    client.get("/health")
+    served = time.perf_counter()
+    worker = client.get("/health/startup").json()
+
+print(json.dumps({
+    "import_ms": (imported - started) * 1000,
+    "first_request_ms": (served - started) * 1000,
+    "worker": worker,
+}))
+"""
+
+
+def measure(env: dict[str, str]) -> dict:
+    """Start a fresh interpreter and time its cold start."""
+    output = subprocess.run(  # noqa: S603
+        [sys.executable, "-c", PROBE],
+        capture_output=True,
+        check=True,
+        env=env,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    """Report the median cold start over several fresh processes."""
+    # Shared by the runs, so only the first creates the tables
+    with tempfile.TemporaryDirectory() as directory:
+        env = dict(os.environ, DATABASE_URL=f"sqlite:///{directory}/f1.db")
+        samples = [measure(env) for _ in range(RUNS)]
+    for key in ("import_ms", "first_request_ms"):
+        values = sorted(sample[key] for sample in samples)
+        print(f"{key}: median {values[len(values) // 2]:.1f} ms")
+    print(f"worker timings (last run): {samples[-1]['worker']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,5 @@
 # src package
+import time
+
+# Taken when the package is first imported, before any of its modules
+STARTED = time.perf_counter()
@@ -0,0 +1,186 @@
+"""Admission control and load shedding for the database-bound routes.
+
+Requests are sorted into route classes, each admitting a fixed number of
+concurrent requests and queueing a bounded number more. When a class's
+queue is full, or a request waited too long, it is answered right away with
+503 and Retry-After instead of piling up until clients time out.
+
+The threadpool running the sync handlers and the database connection pool
+are sized from the same limits, see src/database.py and src/main.py.
+"""
+
+import asyncio
+import json
+import os
+import re
+from dataclasses import asdict, dataclass
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+ADMISSION_CHEAP_CONCURRENCY = int(
+    os.getenv("ADMISSION_CHEAP_CONCURRENCY", "24"),
+)
+ADMISSION_HEAVY_CONCURRENCY = int(
+    os.getenv("ADMISSION_HEAVY_CONCURRENCY", "8"),
+)
+ADMISSION_QUEUE_SIZE = int(os.getenv("ADMISSION_QUEUE_SIZE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+ADMISSION_RETRY_AFTER = int(os.getenv("ADMISSION_RETRY_AFTER", "1"))
+
+ADMISSION_CONCURRENCY = (
+    ADMISSION_CHEAP_CONCURRENCY + ADMISSION_HEAVY_CONCURRENCY
+)
+
+# (methods, path pattern, route class) checked in order; other API routes
+# are cheap lookups and routes outside the API are not admission controlled
+ROUTE_CLASSES: list[tuple[set[str], re.Pattern[str], str]] = [
+    ({"GET", "POST", "DELETE"}, re.compile(r"^/api/v1/seasons/"), "heavy"),
+    ({"GET", "POST"}, re.compile(r"^/api/v1/analytics/"), "heavy"),
+    ({"GET"}, re.compile(r"^/api/v1/[a-z_]+/?$"), "heavy"),
+    ({"GET"}, re.compile(r"^/api/v1/[a-z_]+/wide$"), "heavy"),
+    ({"GET"}, re.compile(r"^/api/v1/[a-z_]+/(race|driver)/"), "heavy"),
+    ({"GET"}, re.compile(r"^/api/v1/races/year/"), "heavy"),
+    ({"GET"}, re.compile(r"^/api/v1/[a-z_]+/search/"), "heavy"),
+]
+
+
+# Long-lived streams would hold a slot for as long as the client listens
+UNMANAGED_ROUTES = re.compile(r"^/api/v1/stream/")
+
+
+def route_class(method: str, path: str) -> str | None:
+    """Get the class of a route: "cheap", "heavy" or None if unmanaged."""
+    # CORS preflights never reach a handler
+    if method == "OPTIONS" or UNMANAGED_ROUTES.match(path):
+        return None
+    for methods, pattern, name in ROUTE_CLASSES:
+        if method in methods and pattern.match(path):
+            return name
+    return "cheap" if path.startswith("/api/") else None
+
+
+@dataclass
+class LimiterStats:
+    """Counters of a route class limiter."""
+
+    concurrency: int
+    queue_size: int
+    in_flight: int = 0
+    queued: int = 0
+    max_queued: int = 0
+    admitted: int = 0
+    rejected: int = 0
+    timed_out: int = 0
+
+
+class Limiter:
+    """Concurrency limit with a bounded wait queue for a route class."""
+
+    def __init__(
+        self,
+        concurrency: int,
+        queue_size: int,
+        queue_timeout: float = ADMISSION_QUEUE_TIMEOUT,
+    ) -> None:
+        self.stats = LimiterStats(concurrency, queue_size)
+        self.queue_timeout = queue_timeout
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """Get the semaphore bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.stats.concurrency)
+            self._loop = loop
+        return self._semaphore
+
+    async def acquire(self) -> bool:
+        """Wait for a slot; False if the queue is full or the wait expired."""
+        semaphore = self._get_semaphore()
+        stats = self.stats
+        if semaphore.locked():
+            if stats.queued >= stats.queue_size:
+                stats.rejected += 1
+                return False
+            stats.queued += 1
+            stats.max_queued = max(stats.max_queued, stats.queued)
+            try:
+                await asyncio.wait_for(
+                    semaphore.acquire(),
+                    self.queue_timeout,
+                )
+            except TimeoutError:
+                stats.timed_out += 1
+                return False
+            finally:
+                stats.queued -= 1
+        else:
+            await semaphore.acquire()
+
+        stats.in_flight += 1
+        stats.admitted += 1
+        return True
+
+    def release(self) -> None:
+        """Free the slot of a finished request."""
+        self.stats.in_flight -= 1
+        self._get_semaphore().release()
+
+
+limiters = {
+    "cheap": Limiter(ADMISSION_CHEAP_CONCURRENCY, ADMISSION_QUEUE_SIZE),
+    "heavy": Limiter(ADMISSION_HEAVY_CONCURRENCY, ADMISSION_QUEUE_SIZE),
+}
+
+
+def admission_stats() -> dict[str, dict[str, int]]:
+    """Get the counters of every route class."""
+    return {name: asdict(limiter.stats) for name, limiter in limiters.items()}
+
+
+class AdmissionControl:
+    """ASGI middleware admitting requests through their class's limiter."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        name = (
+            route_class(scope["method"], scope["path"])
+            if scope["type"] == "http"
+            else None
+        )
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = limiters[name]
+        if not await limiter.acquire():
+            await self._reject(send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
+
+    async def _reject(self, send: Send) -> None:
+        """Answer with 503 and Retry-After."""
+        body = json.dumps({"detail": "Server is busy, retry later"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 503,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(ADMISSION_RETRY_AFTER).encode()),
+                ],
+            },
+        )
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,413 @@
+"""Whole-history analytics computed with Polars over the read tables.
+
+Source rows are read once into a data frame and reused until the tables
+they come from are written to; results of each analysis are memoized the
+same way. This module imports Polars, so the routers import it on first
+use to keep Polars out of worker startup.
+"""
+
+import polars as pl
+from sqlmodel import Session, select
+
+from src.cache import memoized
+from src.models import (
+    Driver,
+    DriverPaceRead,
+    LapPaceRead,
+    LapTime,
+    PitStop,
+    PointsSystem,
+    Race,
+    RacePaceRead,
+    ResultWide,
+    SeasonStandingsRead,
+    SprintResult,
+    StandingRead,
+    StintRead,
+)
+
+# The constructors' championship was first awarded in 1958
+CONSTRUCTORS_CHAMPIONSHIP_START = 1958
+
+# Laps slower than this times a driver's median are left out of the stint
+# degradation fits, e.g. laps behind the safety car
+PACE_OUTLIER_RATIO = 1.07
+
+# Fewest laps a stint's degradation is fitted over
+MIN_FITTED_LAPS = 3
+
+RESULT_COLUMNS = (
+    "race_id",
+    "race_year",
+    "driver_id",
+    "driver_forename",
+    "driver_surname",
+    "constructor_id",
+    "constructor_name",
+    "position",
+    "position_order",
+    "rank",
+)
+
+
+def load_results(session: Session) -> pl.DataFrame:
+    """Read every result with its season, driver and constructor names."""
+    columns = [getattr(ResultWide, name) for name in RESULT_COLUMNS]
+    return pl.DataFrame(
+        session.exec(select(*columns)).all(),
+        schema={
+            "race_id": pl.Int64,
+            "race_year": pl.Int64,
+            "driver_id": pl.Int64,
+            "driver_forename": pl.String,
+            "driver_surname": pl.String,
+            "constructor_id": pl.Int64,
+            "constructor_name": pl.String,
+            "position": pl.Int64,
+            "position_order": pl.Int64,
+            "rank": pl.Int64,
+        },
+        orient="row",
+    )
+
+
+def results_frame(session: Session) -> pl.DataFrame:
+    """Get the frame of every result, read again after result writes."""
+    return memoized(
+        ("results",),
+        (ResultWide.__tablename__,),
+        lambda: load_results(session),
+    )
+
+
+def sprint_results_available(session: Session) -> bool:
+    """Check whether any sprint results were loaded."""
+    statement = select(SprintResult.result_id).limit(1)
+    return session.exec(statement).first() is not None
+
+
+def load_sprint_results(session: Session) -> pl.DataFrame:
+    """Read every sprint result with its season."""
+    statement = select(
+        Race.year,
+        SprintResult.driver_id,
+        SprintResult.constructor_id,
+        SprintResult.position,
+        SprintResult.position_order,
+    ).join(Race, Race.race_id == SprintResult.race_id)
+    return pl.DataFrame(
+        session.exec(statement).all(),
+        schema={
+            "race_year": pl.Int64,
+            "driver_id": pl.Int64,
+            "constructor_id": pl.Int64,
+            "position": pl.Int64,
+            "position_order": pl.Int64,
+        },
+        orient="row",
+    )
+
+
+def sprint_results_frame(session: Session) -> pl.DataFrame:
+    """Get the frame of every sprint result, read again after writes."""
+    return memoized(
+        ("sprint-results",),
+        (SprintResult.__tablename__, Race.__tablename__),
+        lambda: load_sprint_results(session),
+    )
+
+
+def place_points(points: list[float]) -> pl.Expr:
+    """Build an expression scoring classified finishers by their place."""
+    return (
+        pl.when(pl.col("position").is_not_null())
+        .then(
+            pl.col("position_order").replace_strict(
+                dict(enumerate(points, 1)),
+                default=0.0,
+                return_dtype=pl.Float64,
+            ),
+        )
+        .otherwise(0.0)
+    )
+
+
+def score_races(
+    results: pl.DataFrame,
+    sprints: pl.DataFrame | None,
+    system: PointsSystem,
+) -> pl.DataFrame:
+    """Score every race and sprint result under a points system."""
+    fastest_lap = pl.col("rank") == 1
+    if system.fastest_lap_max_position is not None:
+        fastest_lap &= pl.col("position_order").le(
+            system.fastest_lap_max_position,
+        )
+    scored = results.select(
+        "race_year",
+        "driver_id",
+        "constructor_id",
+        points=place_points(system.points)
+        + pl.when(fastest_lap & pl.col("position").is_not_null())
+        .then(system.fastest_lap_points)
+        .otherwise(0.0),
+        wins=(
+            (pl.col("position_order") == 1) & pl.col("position").is_not_null()
+        ).cast(pl.Int64),
+    )
+    if not system.sprint_points or sprints is None:
+        return scored
+
+    sprints = sprints.select(
+        "race_year",
+        "driver_id",
+        "constructor_id",
+        points=place_points(system.sprint_points),
+        wins=pl.lit(0, dtype=pl.Int64),
+    )
+    return pl.concat([scored, sprints])
+
+
+def standings(
+    scored: pl.DataFrame,
+    key: str,
+    names: pl.DataFrame,
+    top: int,
+) -> dict[int, list[StandingRead]]:
+    """Rank the championship of every season, ties broken by wins."""
+    ranked = (
+        scored.group_by("race_year", key)
+        .agg(pl.col("points").sum(), pl.col("wins").sum())
+        .sort(
+            ["race_year", "points", "wins", key],
+            descending=[False, True, True, False],
+        )
+        .filter(pl.int_range(pl.len()).over("race_year") < top)
+        .join(names, on=key, how="left")
+    )
+    seasons: dict[int, list[StandingRead]] = {}
+    for row in ranked.iter_rows(named=True):
+        seasons.setdefault(row["race_year"], []).append(
+            StandingRead(
+                id=row[key],
+                name=row["name"],
+                points=row["points"],
+                wins=row["wins"],
+            ),
+        )
+    return seasons
+
+
+def points_what_if(
+    results: pl.DataFrame,
+    sprints: pl.DataFrame | None,
+    system: PointsSystem,
+) -> list[SeasonStandingsRead]:
+    """Recompute every season's championships under a points system.
+
+    ``sprints`` is only read when the system scores sprints.
+    """
+    scored = score_races(results, sprints, system).filter(
+        pl.col("race_year").is_not_null(),
+    )
+    driver_names = results.group_by("driver_id").agg(
+        name=pl.concat_str(
+            "driver_forename",
+            "driver_surname",
+            separator=" ",
+            ignore_nulls=True,
+        ).last(),
+    )
+    constructor_names = results.group_by("constructor_id").agg(
+        name=pl.col("constructor_name").last(),
+    )
+    drivers = standings(scored, "driver_id", driver_names, system.top)
+    constructors = standings(
+        scored.filter(
+            pl.col("race_year") >= CONSTRUCTORS_CHAMPIONSHIP_START,
+        ),
+        "constructor_id",
+        constructor_names,
+        system.top,
+    )
+    return [
+        SeasonStandingsRead(
+            year=year,
+            drivers=drivers[year],
+            constructors=constructors.get(year, []),
+        )
+        for year in sorted(drivers)
+    ]
+
+
+def load_laps(session: Session, race_id: int) -> pl.DataFrame:
+    """Read the timed laps of a race with the names of their drivers."""
+    statement = (
+        select(
+            LapTime.driver_id,
+            LapTime.lap,
+            LapTime.position,
+            LapTime.milliseconds,
+            Driver.code,
+            Driver.forename,
+            Driver.surname,
+        )
+        .outerjoin(Driver, Driver.driver_id == LapTime.driver_id)
+        .where(
+            LapTime.race_id == race_id,
+            LapTime.milliseconds.is_not(None),
+        )
+    )
+    return pl.DataFrame(
+        session.exec(statement).all(),
+        schema={
+            "driver_id": pl.Int64,
+            "lap": pl.Int64,
+            "position": pl.Int64,
+            "milliseconds": pl.Int64,
+            "driver_code": pl.String,
+            "driver_forename": pl.String,
+            "driver_surname": pl.String,
+        },
+        orient="row",
+    )
+
+
+def load_pit_laps(session: Session, race_id: int) -> pl.DataFrame:
+    """Read the laps a race's drivers pitted on."""
+    statement = (
+        select(PitStop.driver_id, PitStop.lap)
+        .where(PitStop.race_id == race_id)
+        .distinct()
+    )
+    return pl.DataFrame(
+        session.exec(statement).all(),
+        schema={"driver_id": pl.Int64, "lap": pl.Int64},
+        orient="row",
+    )
+
+
+def lap_pace(laps: pl.DataFrame) -> pl.DataFrame:
+    """Compare every lap with the race leader's at the end of that lap.
+
+    The leader of a lap is the driver with the least total time after it.
+    """
+    total = pl.col("milliseconds").cum_sum().over("driver_id")
+    return (
+        laps.sort("driver_id", "lap")
+        .with_columns(total_ms=total)
+        .with_columns(
+            gap_ms=pl.col("total_ms") - pl.col("total_ms").min().over("lap"),
+            delta_ms=pl.col("milliseconds")
+            - pl.col("milliseconds").sort_by("total_ms").first().over("lap"),
+        )
+    )
+
+
+def stints(laps: pl.DataFrame, pit_laps: pl.DataFrame) -> pl.DataFrame:
+    """Split every driver's laps at their pit stops and fit the wear.
+
+    The degradation of a stint is the least squares slope of its lap times
+    against the lap number. The first lap of the race, in and out laps and
+    laps slower than ``PACE_OUTLIER_RATIO`` times the driver's median, such
+    as laps behind the safety car, are left out of the fit.
+    """
+    pit_laps = pit_laps.with_columns(in_lap=pl.lit(value=True))
+    laps = (
+        laps.sort("driver_id", "lap")
+        .join(pit_laps, on=["driver_id", "lap"], how="left")
+        .with_columns(pl.col("in_lap").fill_null(value=False))
+        .with_columns(
+            out_lap=pl.col("in_lap").shift(1).over("driver_id"),
+            slow=pl.col("milliseconds")
+            > pl.col("milliseconds").median().over("driver_id")
+            * PACE_OUTLIER_RATIO,
+        )
+        .with_columns(
+            stint=pl.col("out_lap")
+            .fill_null(value=False)
+            .cum_sum()
+            .over("driver_id")
+            + 1,
+            fitted=~(
+                pl.col("in_lap")
+                | pl.col("out_lap").fill_null(value=False)
+                | pl.col("slow")
+                | (pl.col("lap") == 1)
+            ),
+        )
+    )
+    lap = pl.col("lap").filter("fitted")
+    milliseconds = pl.col("milliseconds").filter("fitted")
+    return (
+        laps.group_by("driver_id", "stint")
+        .agg(
+            start_lap=pl.col("lap").min(),
+            end_lap=pl.col("lap").max(),
+            laps=pl.len(),
+            median_ms=milliseconds.median(),
+            degradation_ms_per_lap=pl.when(
+                pl.col("fitted").sum() >= MIN_FITTED_LAPS,
+            ).then(pl.cov(lap, milliseconds) / lap.var()),
+        )
+        .sort("driver_id", "stint")
+    )
+
+
+def race_pace(
+    laps: pl.DataFrame,
+    pit_laps: pl.DataFrame,
+    race_id: int,
+) -> RacePaceRead:
+    """Summarize the lap time distribution of every driver in a race.
+
+    Drivers are listed in running order after their last lap.
+    """
+    paced = lap_pace(laps)
+    drivers = (
+        paced.group_by("driver_id")
+        .agg(
+            driver_code=pl.col("driver_code").first(),
+            driver_name=pl.concat_str(
+                "driver_forename",
+                "driver_surname",
+                separator=" ",
+                ignore_nulls=True,
+            ).first(),
+            laps=pl.len(),
+            total_ms=pl.col("total_ms").max(),
+            median_ms=pl.col("milliseconds").median(),
+            p10_ms=pl.col("milliseconds").quantile(0.1, "linear"),
+            p90_ms=pl.col("milliseconds").quantile(0.9, "linear"),
+        )
+        .sort(["laps", "total_ms"], descending=[True, False])
+    )
+    driver_stints = stints(laps, pit_laps).partition_by(
+        "driver_id",
+        as_dict=True,
+    )
+    driver_laps = paced.select(
+        "driver_id",
+        *LapPaceRead.model_fields,
+    ).partition_by("driver_id", as_dict=True)
+    return RacePaceRead(
+        race_id=race_id,
+        drivers=[
+            DriverPaceRead(
+                **driver,
+                stints=[
+                    StintRead(**stint)
+                    for stint in driver_stints[(driver["driver_id"],)]
+                    .drop("driver_id")
+                    .iter_rows(named=True)
+                ],
+                lap_times=[
+                    LapPaceRead(**lap)
+                    for lap in driver_laps[(driver["driver_id"],)]
+                    .drop("driver_id")
+                    .iter_rows(named=True)
+                ],
+            )
+            for driver in drivers.drop("total_ms").iter_rows(named=True)
+        ],
+    )
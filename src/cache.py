@@ -0,0 +1,118 @@
+"""In-process caches shared by the routers."""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+
+# Seconds a memoized analysis is trusted, bounding staleness from writes made
+# through other workers
+ANALYTICS_CACHE_TTL = float(os.getenv("ANALYTICS_CACHE_TTL", "60"))
+
+
+class TableVersions:
+    """Per-table write counters that cached reads are validated against.
+
+    Counters live in each worker process, so entries cached from them
+    should also expire to pick up writes made through other workers.
+    """
+
+    def __init__(self) -> None:
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, *tables: str) -> tuple[int, ...]:
+        """Get the current versions of the tables."""
+        return tuple(self._versions.get(table, 0) for table in tables)
+
+    def bump(self, *tables: str) -> None:
+        """Record a write to the tables."""
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+
+
+class LRUCache[K: Hashable, V]:
+    """Thread-safe least-recently-used cache with a fixed capacity."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._items: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: K) -> V | None:
+        """Get a cached value, marking it as recently used."""
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        """Cache a value, evicting the least recently used one if full."""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def pop(self, key: K) -> None:
+        """Drop a cached value if present."""
+        with self._lock:
+            self._items.pop(key, None)
+
+    def clear(self) -> None:
+        """Drop every cached value."""
+        with self._lock:
+            self._items.clear()
+
+
+table_versions = TableVersions()
+
+
+def race_rows(table: str, race_id: int) -> str:
+    """Name the rows of one race in a table, versioned like a table.
+
+    Lets reads of a finished race stay cached while a live race is written.
+    """
+    return f"{table}:{race_id}"
+
+
+# Rendered /races/{race_id}/weekend bodies of completed seasons, see
+# src/routers/races.py
+weekend_cache: LRUCache[int, tuple[tuple[int, ...], float, bytes]] = LRUCache(
+    int(os.getenv("WEEKEND_CACHE_SIZE", "512")),
+)
+
+# Row counts of filtered list queries, see src/pagination.py
+count_cache: LRUCache[Hashable, tuple[tuple[int, ...], float, int]] = LRUCache(
+    int(os.getenv("COUNT_CACHE_SIZE", "4096")),
+)
+
+# Computed analytics, see memoized
+analytics_cache: LRUCache[Hashable, tuple[tuple[int, ...], float, object]] = (
+    LRUCache(int(os.getenv("ANALYTICS_CACHE_SIZE", "256")))
+)
+
+
+def memoized[T](
+    key: Hashable,
+    tables: tuple[str, ...],
+    compute: Callable[[], T],
+) -> T:
+    """Get a computed value, recomputing it after the tables change."""
+    version = table_versions.get(*tables)
+    cached = analytics_cache.get(key)
+    if cached and cached[0] == version and cached[1] > time.monotonic():
+        return cached[2]
+
+    value = compute()
+    analytics_cache.set(
+        key,
+        (version, time.monotonic() + ANALYTICS_CACHE_TTL, value),
+    )
+    return value
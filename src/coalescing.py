@@ -0,0 +1,151 @@
+"""Single-flight coalescing of identical concurrent GET requests.
+
+The first GET for a given path, query and set of relevant headers runs
+the handler; identical GETs arriving while it is in flight wait for it and
+are answered with a copy of its response instead of querying the database
+again. Only ``200`` responses that set no cookies and fit in
+``COALESCE_MAX_BODY`` are shared; otherwise waiting requests run their own
+handler. Range and conditional headers are part of the key, so a partial
+or ``304`` answer is never replayed to a request that did not ask for it.
+Routes outside admission control, such as the event streams, are never
+coalesced.
+"""
+
+import asyncio
+import os
+from dataclasses import asdict, dataclass
+from http import HTTPStatus
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.admission import route_class
+from src.database import PRIMARY_PIN_COOKIE
+
+COALESCE_MAX_BODY = int(os.getenv("COALESCE_MAX_BODY", str(1024 * 1024)))
+
+# Request headers that can change the response body or its headers
+VARY_HEADERS = (
+    b"accept",
+    b"accept-encoding",
+    b"authorization",
+    b"if-modified-since",
+    b"if-none-match",
+    b"if-range",
+    b"origin",
+    b"range",
+    b"x-api-key",
+)
+
+type RequestKey = tuple[str, bytes, tuple[bytes, ...], bool]
+
+
+@dataclass
+class SharedResponse:
+    """Response of a coalesced request, replayed to identical requests."""
+
+    start: Message
+    body: bytes
+
+
+@dataclass
+class CoalescingStats:
+    """Counters of coalesced requests."""
+
+    executed: int = 0
+    collapsed: int = 0
+    not_shared: int = 0
+    in_flight: int = 0
+
+
+stats = CoalescingStats()
+
+
+def coalescing_stats() -> dict[str, int]:
+    """Get the coalescing counters."""
+    return asdict(stats)
+
+
+def request_key(scope: Scope) -> RequestKey:
+    """Identify requests that get the same response."""
+    headers = dict(scope["headers"])
+    pinned = PRIMARY_PIN_COOKIE.encode() in headers.get(b"cookie", b"")
+    return (
+        scope["path"],
+        scope["query_string"],
+        tuple(headers.get(name, b"") for name in VARY_HEADERS),
+        pinned,
+    )
+
+
+class RequestCoalescer:
+    """ASGI middleware sharing one handler execution between identical GETs."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._in_flight: dict[
+            RequestKey,
+            asyncio.Future[SharedResponse | None],
+        ] = {}
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "GET"
+            or route_class(scope["method"], scope["path"]) is None
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        key = request_key(scope)
+        leader = self._in_flight.get(key)
+        if leader is not None:
+            shared = await asyncio.shield(leader)
+            if shared is not None:
+                stats.collapsed += 1
+                await send(shared.start)
+                await send({"type": "http.response.body", "body": shared.body})
+                return
+            stats.not_shared += 1
+            await self.app(scope, receive, send)
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        stats.executed += 1
+        stats.in_flight += 1
+        start: Message | None = None
+        chunks: list[bytes] = []
+        size = 0
+        shareable = True
+        complete = False
+
+        async def capture(message: Message) -> None:
+            nonlocal start, size, shareable, complete
+            if message["type"] == "http.response.start":
+                start = message
+                shareable = message["status"] == HTTPStatus.OK and not any(
+                    name.lower() == b"set-cookie"
+                    for name, _ in message.get("headers", [])
+                )
+            elif message["type"] == "http.response.body" and shareable:
+                size += len(message.get("body", b""))
+                shareable = size <= COALESCE_MAX_BODY
+                complete = not message.get("more_body", False)
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, capture)
+        finally:
+            del self._in_flight[key]
+            stats.in_flight -= 1
+            future.set_result(
+                SharedResponse(start, b"".join(chunks))
+                if shareable and complete and start is not None
+                else None,
+            )
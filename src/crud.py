@@ -0,0 +1,373 @@
+"""Routes reading and writing single rows by primary key, shared by models.
+
+A ``Crud`` builds its statements once, when it is created, and binds only
+the key and the written values per request. This keeps statement
+construction off the request path and lets SQLAlchemy reuse the compiled
+form. Every write is one ``INSERT``, ``UPDATE`` or ``DELETE`` with a
+``RETURNING`` clause, so the written row comes back without being read
+before or after the write; a write matching no row answers 404.
+
+Subclasses add the checks and side effects of a model's writes by
+overriding the hooks, and each router adds the routes with ``add_routes``
+after its own, so its custom paths are matched before ``/{id}``.
+"""
+
+from typing import Annotated, Any, Literal, override
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    HTTPException,
+    Path,
+    Request,
+    Response,
+)
+from sqlalchemy import (
+    ColumnElement,
+    CursorResult,
+    bindparam,
+    delete,
+    insert,
+    update,
+)
+from sqlmodel import Session, SQLModel, select
+
+from src.cache import table_versions
+from src.database import get_read_session, get_session
+from src.events import broker
+from src.hotswap import ensure_writes_allowed
+from src.models import QualifyingWide, ResultWide
+from src.readmodels import WideTable, refresh_wide_tables
+from src.snapshots import (
+    ensure_race_writable,
+    race_writable,
+    snapshot_response,
+)
+
+type Action = Literal["create", "update", "delete"]
+
+# Name of the bound primary key, distinct from every column name
+KEY_PARAM = "key_"
+
+
+class Crud[T: SQLModel]:
+    """Reads and writes of one model by primary key."""
+
+    # Columns whose previous values an update reads first when it changes
+    # them, passed to ``written``
+    tracked: tuple[str, ...] = ()
+
+    def __init__(
+        self,
+        model: type[T],
+        label: str,
+        *,
+        guard: ColumnElement[bool] | None = None,
+    ) -> None:
+        self.model = model
+        self.label = label
+        self.title = f"{label[0].upper()}{label[1:]}"
+        table = model.__table__
+        (key,) = table.primary_key.columns
+        self.key = key.name
+        matched = [key == bindparam(KEY_PARAM)]
+        if guard is not None:
+            # Rows failing the guard are not written, see ``denied``
+            matched.append(guard)
+
+        self._get = select(model).where(key == bindparam(KEY_PARAM))
+        self._get_guarded = select(*table.columns).where(*matched)
+        self._insert = insert(table).returning(*table.columns)
+        # The SET clause is made of the columns bound at execution
+        self._update = update(table).where(*matched).returning(*table.columns)
+        self._delete = delete(table).where(*matched).returning(*table.columns)
+
+    def get(self, session: Session, key: int) -> T | None:
+        """Read a row by primary key."""
+        return session.exec(self._get, params={KEY_PARAM: key}).first()
+
+    def create(self, session: Session, values: dict[str, Any]) -> T:
+        """Insert a row and commit it."""
+        ensure_writes_allowed()
+        values = self.prepare(values)
+        self.check(session, values)
+        row = self._row(session.connection().execute(self._insert, values))
+        self._commit(session, "create", row, {})
+        return row
+
+    def update(
+        self,
+        session: Session,
+        key: int,
+        values: dict[str, Any],
+    ) -> T:
+        """Update the columns in ``values`` of a row and commit it.
+
+        A replace passes every column but the key, a partial update only
+        those it changes.
+        """
+        ensure_writes_allowed()
+        values = self.prepare(values)
+        self.check(session, values)
+        previous = {}
+        if any(column in values for column in self.tracked):
+            current = self.get(session, key)
+            if current is not None:
+                previous = {
+                    column: getattr(current, column) for column in self.tracked
+                }
+
+        # An empty update changes nothing, but still reports a missing row
+        statement = self._update if values else self._get_guarded
+        row = self._row(
+            session.connection().execute(
+                statement,
+                {**values, KEY_PARAM: key},
+            ),
+        )
+        if row is None:
+            raise self._missed(session, key)
+        self._commit(session, "update", row, previous)
+        return row
+
+    def delete(self, session: Session, key: int) -> T:
+        """Delete a row and commit it."""
+        ensure_writes_allowed()
+        row = self._row(
+            session.connection().execute(self._delete, {KEY_PARAM: key}),
+        )
+        if row is None:
+            raise self._missed(session, key)
+        self._commit(session, "delete", row, {})
+        return row
+
+    def prepare(self, values: dict[str, Any]) -> dict[str, Any]:
+        """Add the columns computed from the values being written."""
+        return values
+
+    def check(self, session: Session, values: dict[str, Any]) -> None:
+        """Reject values that may not be written."""
+
+    def denied(self, session: Session, row: T) -> None:
+        """Raise the error of a row the guard rejects."""
+
+    def refresh(
+        self,
+        session: Session,
+        action: Action,
+        row: T,
+    ) -> list[str] | None:
+        """Rewrite the rows derived from a written row, before the commit.
+
+        Returns the tables rewritten, if any.
+        """
+
+    def written(
+        self,
+        action: Action,
+        row: T,
+        previous: dict[str, Any],
+    ) -> None:
+        """React to a committed write."""
+
+    def snapshot_key(self, key: int) -> str | None:
+        """Get the key of a frozen snapshot of a row, if it may have one."""
+
+    def add_routes(
+        self,
+        router: APIRouter,
+        path: str,
+        *,
+        create_model: type[SQLModel],
+        update_model: type[SQLModel],
+        read_model: type[SQLModel],
+    ) -> None:
+        """Add the get, create, replace, update and delete routes."""
+        item_path = f"{path}/{{{self.key}}}"
+        key_param = Annotated[int, Path(alias=self.key)]
+        name = self.model.__tablename__
+
+        def get_item(
+            key: key_param,
+            request: Request,
+            session: Annotated[Session, Depends(get_read_session)],
+        ) -> SQLModel | Response:
+            snapshot_key = self.snapshot_key(key)
+            if snapshot_key:
+                snapshot = snapshot_response(snapshot_key, request)
+                if snapshot:
+                    return snapshot
+
+            row = self.get(session, key)
+            if row is None:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"{self.title} not found",
+                )
+            return row
+
+        def create_item(
+            body: create_model,
+            session: Annotated[Session, Depends(get_session)],
+        ) -> SQLModel:
+            return self.create(session, body.model_dump())
+
+        def replace_item(
+            key: key_param,
+            body: create_model,
+            session: Annotated[Session, Depends(get_session)],
+        ) -> SQLModel:
+            return self.update(session, key, body.model_dump())
+
+        def update_item(
+            key: key_param,
+            body: update_model,
+            session: Annotated[Session, Depends(get_session)],
+        ) -> SQLModel:
+            return self.update(
+                session,
+                key,
+                body.model_dump(exclude_unset=True),
+            )
+
+        def delete_item(
+            key: key_param,
+            session: Annotated[Session, Depends(get_session)],
+        ) -> dict[str, str]:
+            self.delete(session, key)
+            return {"message": f"{self.title} deleted successfully"}
+
+        router.add_api_route(
+            item_path,
+            get_item,
+            methods=["GET"],
+            response_model=read_model,
+            name=f"get_{name}",
+            description=f"Get a specific {self.label} by ID.",
+        )
+        router.add_api_route(
+            path,
+            create_item,
+            methods=["POST"],
+            response_model=read_model,
+            name=f"create_{name}",
+            description=f"Create a new {self.label}.",
+        )
+        router.add_api_route(
+            item_path,
+            replace_item,
+            methods=["PUT"],
+            response_model=read_model,
+            name=f"replace_{name}",
+            description=f"Replace every field of a {self.label}.",
+        )
+        router.add_api_route(
+            item_path,
+            update_item,
+            methods=["PATCH"],
+            response_model=read_model,
+            name=f"update_{name}",
+            description=f"Update the given fields of a {self.label}.",
+        )
+        router.add_api_route(
+            item_path,
+            delete_item,
+            methods=["DELETE"],
+            name=f"delete_{name}",
+            description=f"Delete a {self.label}.",
+        )
+
+    def _row(self, result: CursorResult[Any]) -> T | None:
+        """Build the model of the row a statement returned, if any."""
+        row = result.mappings().one_or_none()
+        return self.model.model_validate(row) if row else None
+
+    def _missed(self, session: Session, key: int) -> HTTPException:
+        """Explain a write that matched no row.
+
+        Only this failure path reads the row, to tell a row the guard
+        rejects, which raises its own error, from a missing one.
+        """
+        row = self.get(session, key)
+        if row is not None:
+            self.denied(session, row)
+        return HTTPException(status_code=404, detail=f"{self.title} not found")
+
+    def _commit(
+        self,
+        session: Session,
+        action: Action,
+        row: T,
+        previous: dict[str, Any],
+    ) -> None:
+        """Refresh the derived rows, commit and announce the write."""
+        tables = self.refresh(session, action, row) or []
+        session.commit()
+        table_versions.bump(self.model.__tablename__, *tables)
+        self.written(action, row, previous)
+
+
+class NamedCrud[T: SQLModel](Crud[T]):
+    """Rows whose names are copied into the wide tables."""
+
+    def refresh(self, session: Session, action: Action, row: T) -> list[str]:
+        """Rewrite the wide table rows naming an updated or deleted row."""
+        if action == "create":
+            return []
+        refresh_wide_tables(session, self.key, getattr(row, self.key))
+        return [ResultWide.__tablename__, QualifyingWide.__tablename__]
+
+
+class RaceDataCrud[T: SQLModel](Crud[T]):
+    """Rows belonging to a race, such as results, streamed to subscribers."""
+
+    tracked = ("race_id",)
+
+    def __init__(
+        self,
+        model: type[T],
+        label: str,
+        *,
+        read: type[SQLModel],
+        wide_table: WideTable,
+    ) -> None:
+        super().__init__(model, label, guard=race_writable(model.race_id))
+        self.read = read
+        self.wide_table = wide_table
+
+    def check(self, session: Session, values: dict[str, Any]) -> None:
+        """Reject rows moved into a race of a frozen season."""
+        if values.get("race_id") is not None:
+            ensure_race_writable(session, values["race_id"])
+
+    def denied(self, session: Session, row: T) -> None:
+        """Reject rows of a race in a frozen season."""
+        ensure_race_writable(session, row.race_id)
+
+    @override
+    def refresh(self, session: Session, action: Action, row: T) -> list[str]:
+        """Rewrite the wide table row of the written row."""
+        key = getattr(row, self.key)
+        self.wide_table.refresh(session, self.key, key)
+        return [self.wide_table.model.__tablename__]
+
+    def written(
+        self,
+        action: Action,
+        row: T,
+        previous: dict[str, Any],
+    ) -> None:
+        """Notify the race's subscribers, and those of its previous race."""
+        name = self.model.__tablename__
+        key = {self.key: getattr(row, self.key)}
+        previous_race_id = previous.get("race_id", row.race_id)
+        if previous_race_id != row.race_id:
+            broker.publish(previous_race_id, name, "delete", key)
+        broker.publish(
+            row.race_id,
+            name,
+            action,
+            key
+            if action == "delete"
+            else self.read.model_validate(row).model_dump(mode="json"),
+        )
@@ -1,20 +1,214 @@
+import hashlib
+import itertools
 import os
-from collections.abc import Generator
+import time
+from collections.abc import Generator, Iterable
 
-from sqlmodel import Session, SQLModel, create_engine
+from fastapi import Request, Response
+from sqlalchemy import Engine, inspect, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import Session, SQLModel, create_engine, select
+
+from src.admission import ADMISSION_CONCURRENCY
+from src.models import SchemaVersion
+from src.readmodels import rebuild_wide_tables
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./f1_data.db")
 
-engine = create_engine(DATABASE_URL, echo=False)
+# Optional comma separated read replica URLs, e.g. a second SQLite file or
+# "sqlite:///file:f1_data.db?mode=ro&uri=true"; reads use the primary if unset
+DATABASE_READ_URLS = [
+    url.strip()
+    for url in os.getenv("DATABASE_READ_URL", "").split(",")
+    if url.strip()
+]
+
+# Seconds a client keeps reading from the primary after it has written
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+PRIMARY_PIN_COOKIE = "f1_primary_until"
+
+# Number of pooled connections to open (and statements to compile) before
+# the first request is served; 0 disables pre-warming
+DATABASE_PREWARM_CONNECTIONS = int(
+    os.getenv("DATABASE_PREWARM_CONNECTIONS", "0"),
+)
+
+# One pooled connection per request admitted at once, see src/admission.py;
+# the overflow serves routes outside admission control such as /health
+DATABASE_POOL_SIZE = int(
+    os.getenv("DATABASE_POOL_SIZE", str(ADMISSION_CONCURRENCY)),
+)
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "4"))
+
+
+def pool_options(url: str) -> dict[str, int]:
+    """Get the connection pool sizing for a database URL."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in {
+        None,
+        "",
+        ":memory:",
+    }:
+        # In-memory SQLite uses a single static connection
+        return {}
+    return {
+        "pool_size": DATABASE_POOL_SIZE,
+        "max_overflow": DATABASE_MAX_OVERFLOW,
+    }
+
+
+engine = create_engine(DATABASE_URL, echo=False, **pool_options(DATABASE_URL))
+read_engines = [
+    create_engine(url, echo=False, **pool_options(url))
+    for url in DATABASE_READ_URLS
+]
+_read_engine_cycle = itertools.cycle(read_engines or [engine])
+
+
+def schema_fingerprint() -> str:
+    """Hash the tables, columns and indexes declared by the models."""
+    digest = hashlib.sha256()
+    for table in sorted(SQLModel.metadata.tables.values(), key=str):
+        digest.update(table.name.encode())
+        for column in table.columns:
+            digest.update(
+                f"{column.name}:{column.type}:{column.nullable}:"
+                f"{column.primary_key}".encode(),
+            )
+        for index in sorted(table.indexes, key=lambda index: index.name):
+            columns = ",".join(column.name for column in index.columns)
+            digest.update(f"{index.name}:{columns}:{index.unique}".encode())
+    return digest.hexdigest()[:16]
+
+
+def stored_schema_fingerprint(bind: Engine) -> str | None:
+    """Get the schema fingerprint recorded in the database, if any."""
+    try:
+        with Session(bind) as session:
+            version = session.get(SchemaVersion, 1)
+    except DBAPIError:
+        # The schema_version table does not exist yet
+        return None
+    return version.fingerprint if version else None
+
+
+def column_names(bind: Engine, table: str) -> set[str]:
+    """Get the names of the columns a table has in the database."""
+    return {column["name"] for column in inspect(bind).get_columns(table)}
+
+
+def create_tables(bind: Engine) -> None:
+    """Create the tables that do not exist yet."""
+    with bind.begin() as connection:
+        for table in SQLModel.metadata.sorted_tables:
+            connection.execute(CreateTable(table, if_not_exists=True))
+
 
+def add_missing_columns(bind: Engine) -> None:
+    """Add columns and indexes declared since the tables were created.
+
+    Existing rows get NULL in the new columns until they are written again
+    or reloaded with load_data.py. Workers starting together may race to
+    add the same column; the one that loses finds it added and carries on.
+    """
+    quote = bind.dialect.identifier_preparer.quote
+    for table in SQLModel.metadata.sorted_tables:
+        existing = column_names(bind, table.name)
+        for column in table.columns:
+            if column.name in existing:
+                continue
+            column_type = column.type.compile(dialect=bind.dialect)
+            try:
+                with bind.begin() as connection:
+                    connection.exec_driver_sql(
+                        f"ALTER TABLE {quote(table.name)} "
+                        f"ADD COLUMN {quote(column.name)} {column_type}",
+                    )
+            except DBAPIError:
+                if column.name not in column_names(bind, table.name):
+                    raise
+        with bind.begin() as connection:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+
+
+def create_db_and_tables(bind: Engine = engine) -> None:
+    """Create database and all tables.
+
+    Reflecting and creating every table is skipped when the database was
+    already created from the same model definitions. Otherwise the wide
+    read tables are rebuilt too, as their columns may have changed. Tables
+    and indexes are created with ``IF NOT EXISTS``, so several workers can
+    start against the same database at once.
+    """
+    fingerprint = schema_fingerprint()
+    if stored_schema_fingerprint(bind) == fingerprint:
+        return
+
+    create_tables(bind)
+    add_missing_columns(bind)
+    with Session(bind) as session:
+        rebuild_wide_tables(session)
+        session.merge(SchemaVersion(id=1, fingerprint=fingerprint))
+        session.commit()
+
+
+def prewarm(models: Iterable[type[SQLModel]]) -> None:
+    """Open pooled connections and compile the common model statements."""
+    if DATABASE_PREWARM_CONNECTIONS <= 0:
+        return
+
+    models = list(models)
+    for pooled_engine in [engine, *read_engines]:
+        connections = [
+            pooled_engine.connect()
+            for _ in range(DATABASE_PREWARM_CONNECTIONS)
+        ]
+        for connection in connections:
+            connection.close()
+
+        with Session(pooled_engine) as session:
+            for model in models:
+                session.get(model, 0)
+                session.exec(select(model).offset(0).limit(1)).all()
+
+
+def is_pinned_to_primary(request: Request) -> bool:
+    """Check whether the client wrote recently and must read its writes."""
+    try:
+        pinned_until = float(request.cookies.get(PRIMARY_PIN_COOKIE, 0))
+    except ValueError:
+        return False
+    return pinned_until > time.time()
+
+
+def get_read_engine(request: Request) -> Engine:
+    """Get the engine to read from: a replica, or the primary if pinned."""
+    if not read_engines or is_pinned_to_primary(request):
+        return engine
+    return next(_read_engine_cycle)
+
+
+def get_read_session(request: Request) -> Generator[Session]:
+    """Get database session for read-only queries."""
+    with Session(get_read_engine(request)) as session:
+        yield session
 
-def create_db_and_tables() -> None:
-    """Create database and all tables."""
-    SQLModel.metadata.create_all(engine)
 
+def get_session(response: Response) -> Generator[Session]:
+    """Get database session on the primary for writes.
 
-def get_session() -> Generator[Session]:
-    """Get database session."""
+    When read replicas are configured the client is pinned to the primary
+    for a short window so its following reads see its own writes.
+    """
+    if read_engines:
+        response.set_cookie(
+            PRIMARY_PIN_COOKIE,
+            str(time.time() + READ_YOUR_WRITES_SECONDS),
+            max_age=max(1, round(READ_YOUR_WRITES_SECONDS)),
+            httponly=True,
+        )
     with Session(engine) as session:
         yield session
@@ -0,0 +1,135 @@
+"""In-process change feed of race data for the streaming routes.
+
+Write handlers publish change events from the threadpool; subscribers on
+the event loop receive the events of their race. The most recent events
+are kept in a bounded ring buffer so reconnecting clients can resume from
+the last event ID they saw.
+
+Events, their IDs and the buffer are kept per worker process. Event IDs
+are therefore qualified with the worker, as ``<worker>-<n>``. A client
+that reconnects to another worker, or to a restarted one, is told to
+reload instead of being matched against a different sequence.
+"""
+
+import asyncio
+import os
+import secrets
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any
+
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1024"))
+SUBSCRIBER_QUEUE_SIZE = int(os.getenv("SUBSCRIBER_QUEUE_SIZE", "256"))
+
+
+@dataclass(frozen=True)
+class ChangeEvent:
+    """Created, updated or deleted row of a race."""
+
+    id: int
+    race_id: int
+    table: str
+    operation: str
+    data: dict[str, Any]
+
+
+@dataclass(eq=False)
+class Subscription:
+    """Queue of the events of one race for one connected client."""
+
+    race_id: int
+    loop: asyncio.AbstractEventLoop
+    queue: asyncio.Queue[ChangeEvent] = field(
+        default_factory=lambda: asyncio.Queue(SUBSCRIBER_QUEUE_SIZE),
+    )
+    # Set when events were dropped because the client reads too slowly
+    overflowed: bool = False
+
+    def deliver(self, event: ChangeEvent) -> None:
+        """Queue an event on the subscriber's event loop."""
+        if event.race_id != self.race_id or self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+
+class EventBroker:
+    """Fan-out of change events to subscribers with a replay buffer."""
+
+    def __init__(self, buffer_size: int) -> None:
+        # The process ID alone could be reused by a restarted worker
+        self.worker_id = f"{os.getpid()}.{secrets.token_hex(4)}"
+        self._buffer: deque[ChangeEvent] = deque(maxlen=buffer_size)
+        self._next_id = 1
+        self._subscriptions: set[Subscription] = set()
+        self._lock = threading.Lock()
+
+    def publish(
+        self,
+        race_id: int,
+        table: str,
+        operation: str,
+        data: dict[str, Any],
+    ) -> ChangeEvent:
+        """Record an event and send it to the race's subscribers."""
+        with self._lock:
+            event = ChangeEvent(self._next_id, race_id, table, operation, data)
+            self._next_id += 1
+            self._buffer.append(event)
+            subscriptions = list(self._subscriptions)
+
+        for subscription in subscriptions:
+            if subscription.race_id == race_id:
+                subscription.loop.call_soon_threadsafe(
+                    subscription.deliver,
+                    event,
+                )
+        return event
+
+    def event_id(self, event: ChangeEvent) -> str:
+        """Get the ID of an event as sent to clients."""
+        return f"{self.worker_id}-{event.id}"
+
+    def subscribe(
+        self,
+        race_id: int,
+        last_event_id: str | None,
+    ) -> tuple[Subscription, list[ChangeEvent], bool]:
+        """Subscribe to a race's events.
+
+        Returns the subscription, the buffered events of the race after
+        ``last_event_id`` and whether events after it may have been missed,
+        because they were dropped from the buffer or the ID is not of this
+        worker, in which case the client has to reload its state.
+        """
+        subscription = Subscription(race_id, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        if last_event_id is None:
+            return subscription, [], False
+
+        worker_id, _, number = last_event_id.rpartition("-")
+        if worker_id != self.worker_id or not number.isdecimal():
+            return subscription, [], True
+        last_number = int(number)
+        with self._lock:
+            backlog = [
+                event
+                for event in self._buffer
+                if event.id > last_number and event.race_id == race_id
+            ]
+            missed = bool(self._buffer) and self._buffer[0].id > (
+                last_number + 1
+            )
+        return subscription, backlog, missed
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """Stop sending events to a subscription."""
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+
+broker = EventBroker(EVENT_BUFFER_SIZE)
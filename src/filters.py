@@ -0,0 +1,189 @@
+"""Structured filters and ordering for list routes.
+
+Filters are query parameters named ``<field>__<operator>``, or just
+``<field>`` for equality, e.g. ``?year__gte=2010&driver_id__in=1,4``.
+``order_by`` takes comma separated fields, each optionally prefixed with
+``-`` for descending order, e.g. ``?order_by=-points,position_order``.
+Values are validated against the model's field types and bound as SQL
+parameters.
+
+To keep every query an index range scan, a request is only accepted when
+one of its filters uses the leading column of an index, or, without
+filters, when it orders by the leading column of an index.
+
+Any other query parameter must name a field, so a misspelled filter is
+rejected rather than ignored; only the ``?_=1`` cache-buster is let
+through. ``filter_openapi`` documents the filters of a route, since they
+are read from the query string rather than declared one by one.
+"""
+
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+from fastapi import HTTPException, Request
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import ColumnElement, Select
+from sqlmodel import SQLModel
+
+OPERATORS: dict[str, Callable[[Any, Any], ColumnElement[bool]]] = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "in": lambda column, values: column.in_(values),
+    "isnull": lambda column, value: (
+        column.is_(None) if value else column.is_not(None)
+    ),
+}
+
+# Operators that can narrow a scan through an index
+INDEXABLE_OPERATORS = {"eq", "lt", "lte", "gt", "gte", "in", "isnull"}
+
+PAGINATION_PARAMS = {"skip", "limit", "order_by", "total"}
+
+# Parameters added only to bypass caches, such as jQuery's ``_``
+CACHE_BUSTER_PARAMS = {"_"}
+
+
+@dataclass
+class QueryFilters:
+    """Validated filters and ordering for a list query."""
+
+    where: list[ColumnElement[bool]] = field(default_factory=list)
+    order_by: list[ColumnElement[Any]] = field(default_factory=list)
+    # Normalized (field, operator, value) filters identifying the rows
+    key: tuple[tuple[str, str, str], ...] = ()
+
+    def apply[T: Select[Any]](self, statement: T) -> T:
+        """Add the filters and ordering to a select statement."""
+        return statement.where(*self.where).order_by(*self.order_by)
+
+
+def indexed_columns(model: type[SQLModel]) -> set[str]:
+    """Get the columns that lead an index of the model's table."""
+    table = model.__table__
+    leading = {index.columns[0].name for index in table.indexes}
+    leading.update(column.name for column in list(table.primary_key)[:1])
+    return leading
+
+
+def _parse_value(
+    adapter: TypeAdapter[Any],
+    name: str,
+    operator: str,
+    raw: str,
+) -> object:
+    """Validate a raw query parameter value for a filter."""
+    try:
+        if operator == "in":
+            return [adapter.validate_python(item) for item in raw.split(",")]
+        if operator == "isnull":
+            return TypeAdapter(bool).validate_python(raw)
+        return adapter.validate_python(raw)
+    except ValidationError as error:
+        message = error.errors()[0]["msg"]
+        raise HTTPException(
+            status_code=400,
+            detail=f"Invalid value for {name}__{operator}: {message}",
+        ) from None
+
+
+def filter_openapi(
+    model: type[SQLModel],
+    ignore: Iterable[str] = (),
+) -> dict[str, Any]:
+    """Describe a model's filters as OpenAPI query parameters.
+
+    Pass the result as ``openapi_extra`` of a route using ``filter_params``.
+    """
+    ignored = PAGINATION_PARAMS | set(ignore)
+    operators = ", ".join(OPERATORS)
+    return {
+        "parameters": [
+            {
+                "name": name,
+                "in": "query",
+                "required": False,
+                "schema": TypeAdapter(info.annotation).json_schema(),
+                "description": (
+                    f"Equals filter; `{name}__<operator>` takes one of "
+                    f"{operators}, with comma separated values for in"
+                ),
+            }
+            for name, info in model.model_fields.items()
+            if name not in ignored
+        ],
+    }
+
+
+def filter_params(
+    model: type[SQLModel],
+    ignore: Iterable[str] = (),
+) -> Callable[..., QueryFilters]:
+    """Build a dependency parsing structured filters for a model's route.
+
+    Query parameters named in ``ignore`` are left to the route itself.
+    """
+    fields = {
+        name: TypeAdapter(info.annotation)
+        for name, info in model.model_fields.items()
+    }
+    indexed = indexed_columns(model)
+    ignored = PAGINATION_PARAMS | CACHE_BUSTER_PARAMS | set(ignore)
+
+    def dependency(
+        request: Request,
+        order_by: str | None = None,
+    ) -> QueryFilters:
+        filters = QueryFilters()
+        index_used = False
+
+        for param, raw in request.query_params.multi_items():
+            if param in ignored:
+                continue
+            name, _, operator = param.partition("__")
+            operator = operator or "eq"
+            if name not in fields:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown filter field: {name}",
+                )
+            if operator not in OPERATORS:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown filter operator: {operator}",
+                )
+
+            value = _parse_value(fields[name], name, operator, raw)
+            column = getattr(model, name)
+            filters.where.append(OPERATORS[operator](column, value))
+            filters.key += ((name, operator, repr(value)),)
+            index_used |= name in indexed and operator in INDEXABLE_OPERATORS
+
+        for term in order_by.split(",") if order_by else []:
+            name = term.strip().removeprefix("-")
+            if name not in fields:
+                raise HTTPException(
+                    status_code=400,
+                    detail=f"Unknown order_by field: {name}",
+                )
+            column = getattr(model, name)
+            filters.order_by.append(
+                column.desc() if term.strip().startswith("-") else column,
+            )
+            if not filters.where and len(filters.order_by) == 1:
+                index_used |= name in indexed
+
+        if (filters.where or filters.order_by) and not index_used:
+            raise HTTPException(
+                status_code=400,
+                detail="Filters or order_by must use an indexed field: "
+                + ", ".join(sorted(indexed)),
+            )
+        filters.key = tuple(sorted(filters.key))
+        return filters
+
+    return dependency
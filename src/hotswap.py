@@ -0,0 +1,296 @@
+"""Hot swap of the SQLite database file rebuilt by load_data.py.
+
+The loader builds a complete database in a separate file and moves it over
+the served one with an atomic rename. Each worker polls the identity of the
+file; once it changes, the worker disposes its connection pools so new
+requests open the new file, while requests already running finish on the
+old one, which stays readable until its last connection is closed.
+
+Writes made to the served file while a new one is built would be lost with
+it, so the loader pauses them: while the flag file ``<database>.reloading``
+exists, API writes are answered with 503 and the ingest writer holds its
+batches until the new file is in place. The swap is aborted if the served
+file was written to anyway.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from types import TracebackType
+from typing import Self
+
+from fastapi import HTTPException
+from sqlalchemy import Engine, make_url
+from sqlmodel import SQLModel
+
+from src.cache import (
+    analytics_cache,
+    count_cache,
+    table_versions,
+    weekend_cache,
+)
+from src.database import DATABASE_URL, engine, read_engines
+
+logger = logging.getLogger(__name__)
+
+# Seconds between checks of whether the database file has been replaced
+DATABASE_SWAP_POLL = float(os.getenv("DATABASE_SWAP_POLL", "1"))
+# Seconds clients are told to wait before retrying a write during a reload
+RELOAD_RETRY_AFTER = int(os.getenv("RELOAD_RETRY_AFTER", "30"))
+
+type FileId = tuple[int, int]
+
+
+def sqlite_path(url: str) -> Path | None:
+    """Get the file of a SQLite database URL, or None for other databases."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "sqlite" or parsed.database in {
+        None,
+        "",
+        ":memory:",
+    }:
+        return None
+    database = parsed.database.removeprefix("file:")
+    return Path(database.partition("?")[0]).resolve()
+
+
+def file_id(path: Path) -> FileId | None:
+    """Identify a file by device and inode, which a rename replaces."""
+    try:
+        stat = path.stat()
+    except FileNotFoundError:
+        return None
+    return stat.st_dev, stat.st_ino
+
+
+def reload_flag(path: Path) -> Path:
+    """Get the flag file pausing writes while a database file is rebuilt."""
+    return path.with_name(f"{path.name}.reloading")
+
+
+def swap_engines(path: Path) -> None:
+    """Drop pooled connections to a replaced file and stale cached reads."""
+    for pooled_engine in [engine, *read_engines]:
+        url = pooled_engine.url.render_as_string(hide_password=False)
+        if sqlite_path(url) == path:
+            # Checked out connections are closed when they are returned
+            pooled_engine.dispose()
+    weekend_cache.clear()
+    count_cache.clear()
+    # Also versioned per race, which the table bumps below do not cover
+    analytics_cache.clear()
+    table_versions.bump(*SQLModel.metadata.tables)
+
+
+class DatabaseWatcher:
+    """Task swapping the engines over when the database file is replaced."""
+
+    def __init__(self, url: str, interval: float) -> None:
+        self.path = sqlite_path(url)
+        self.interval = interval
+        self.swaps = 0
+        self._current = file_id(self.path) if self.path else None
+        self._lock = threading.Lock()
+        self._task: asyncio.Task[None] | None = None
+        # Set by the poll once a paused reload has finished
+        self._resumed: asyncio.Event | None = None
+
+    def start(self) -> None:
+        """Start watching on the running event loop; no-op without a file."""
+        if self.path is not None:
+            self._resumed = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    def check(self) -> None:
+        """Swap right away if the file was replaced since the last poll."""
+        if self.path is None:
+            return
+        latest = file_id(self.path)
+        with self._lock:
+            if latest is None or latest == self._current:
+                return
+            self._current = latest
+            self.swaps += 1
+        swap_engines(self.path)
+        logger.info("Switched to the new database file %s", self.path)
+
+    def writes_paused(self) -> bool:
+        """Check whether the served file is being rebuilt."""
+        return self.path is not None and reload_flag(self.path).exists()
+
+    async def writes_resumed(self) -> None:
+        """Wait until the served file is no longer being rebuilt."""
+        if self._resumed is None or not self.writes_paused():
+            return
+        self._resumed.clear()
+        await self._resumed.wait()
+
+    async def stop(self) -> None:
+        """Stop watching."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await self._task
+        self._task = None
+
+    async def _run(self) -> None:
+        """Poll the file identity and swap when it changes."""
+        while True:
+            await asyncio.sleep(self.interval)
+            self.check()
+            if self._resumed is not None and not self.writes_paused():
+                self._resumed.set()
+
+
+watcher = DatabaseWatcher(DATABASE_URL, DATABASE_SWAP_POLL)
+
+
+def ensure_writes_allowed() -> None:
+    """Reject writes while the served database is being rebuilt.
+
+    Also switches to a replaced file before writing, so a write made just
+    after a swap does not go to the old file before the next poll.
+    """
+    if watcher.writes_paused():
+        raise HTTPException(
+            status_code=503,
+            detail="The database is being reloaded, retry later",
+            headers={"Retry-After": str(RELOAD_RETRY_AFTER)},
+        )
+    watcher.check()
+
+
+def data_version(connection: sqlite3.Connection) -> int:
+    """Get the counter of commits made to a file by other connections."""
+    (version,) = connection.execute("PRAGMA data_version").fetchone()
+    return version
+
+
+class WritePause:
+    """Pause of the API's writes to a served database file during a reload.
+
+    Entering creates the flag file the workers check before writing and
+    notes the file's ``PRAGMA data_version``; ``replace`` then refuses to
+    swap if the file changed since, as the change would be lost.
+    """
+
+    def __init__(self, target: Path) -> None:
+        self.target = target
+        self.flag = reload_flag(target)
+        self._connection: sqlite3.Connection | None = None
+        self._version = 0
+
+    def __enter__(self) -> Self:
+        try:
+            self.flag.open("x").close()
+        except FileExistsError:
+            msg = (
+                f"{self.flag} exists: another load is running, or remove it "
+                "if a load was interrupted"
+            )
+            raise RuntimeError(msg) from None
+        if self.target.exists():
+            # The version is only comparable within one connection
+            self._connection = sqlite3.connect(
+                self.target,
+                timeout=30,
+                isolation_level=None,
+            )
+            self._version = data_version(self._connection)
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+        self.flag.unlink(missing_ok=True)
+
+    def replace(self, source: Path) -> None:
+        """Move a file over the served one unless it was written to."""
+        if self._connection is None:
+            source.replace(self.target)
+            return
+
+        # Holding the write lock, no write is half done in the served file
+        # and none can start until it has been replaced
+        self._connection.execute("BEGIN IMMEDIATE")
+        try:
+            if data_version(self._connection) != self._version:
+                msg = (
+                    f"{self.target} was written to during the load, which "
+                    "would lose the writes; load again"
+                )
+                raise RuntimeError(msg)
+            source.replace(self.target)
+        finally:
+            self._connection.execute("ROLLBACK")
+
+
+def verify_database(path: Path, expected_counts: dict[str, int]) -> None:
+    """Check a database file's integrity and the row counts of its tables."""
+    connection = sqlite3.connect(path)
+    try:
+        (integrity,) = connection.execute("PRAGMA quick_check").fetchone()
+        if integrity != "ok":
+            msg = f"{path} failed the integrity check: {integrity}"
+            raise RuntimeError(msg)
+        for table, expected in expected_counts.items():
+            # Table names come from the models and cannot be bound
+            (count,) = connection.execute(
+                f'SELECT count(*) FROM "{table}"',  # noqa: S608
+            ).fetchone()
+            if count != expected:
+                msg = f"{path}: {table} has {count} rows, expected {expected}"
+                raise RuntimeError(msg)
+    finally:
+        connection.close()
+
+
+def publish_database(
+    build: Engine,
+    pause: WritePause,
+    expected_counts: dict[str, int],
+    *,
+    vacuum: bool = True,
+) -> None:
+    """Move a built database over the served file in one atomic rename.
+
+    With ``vacuum`` the build is first compacted into a fresh file with
+    ``VACUUM INTO``. The file is moved into place only once its integrity
+    and row counts are verified, and only if the served file was not written
+    to during the load; the served file is left untouched otherwise.
+    """
+    build_path = sqlite_path(build.url.render_as_string(hide_password=False))
+    if build_path is None:
+        msg = "Only SQLite database files can be published"
+        raise ValueError(msg)
+
+    target = pause.target
+    source = build_path
+    if vacuum:
+        source = target.with_name(f"{target.name}.next")
+        source.unlink(missing_ok=True)
+        with build.connect().execution_options(
+            isolation_level="AUTOCOMMIT",
+        ) as connection:
+            connection.exec_driver_sql("VACUUM INTO ?", (str(source),))
+    build.dispose()
+
+    try:
+        verify_database(source, expected_counts)
+        pause.replace(source)
+    except RuntimeError:
+        if source != build_path:
+            source.unlink(missing_ok=True)
+        raise
+    build_path.unlink(missing_ok=True)
@@ -0,0 +1,228 @@
+"""Group-commit writer for high-rate live timing ingest.
+
+Ingest requests only validate their records and queue them. A single
+writer task drains the queue and writes what has accumulated in one
+transaction, flushing once ``INGEST_BATCH_SIZE`` records are waiting or
+``INGEST_FLUSH_INTERVAL`` seconds after the first one, so a burst of
+updates costs one commit instead of one per record. When the queue is full
+requests are rejected instead of waiting, see src/routers/laps.py.
+
+Records referring to unknown races or drivers are rejected before they are
+queued. If a batch still fails on a bad record, it is split in halves and
+written again, so only the records that fail alone are lost.
+"""
+
+import asyncio
+import contextlib
+import logging
+import os
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from typing import Any
+
+from sqlalchemy import bindparam
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlmodel import Session, select
+
+from src.cache import race_rows, table_versions
+from src.database import engine
+from src.hotswap import watcher
+from src.models import Driver, LapTime, Race
+
+logger = logging.getLogger(__name__)
+
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "10000"))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", "1000"))
+INGEST_FLUSH_INTERVAL = float(os.getenv("INGEST_FLUSH_INTERVAL", "0.05"))
+
+LAP_TIME_KEY = ("race_id", "driver_id", "lap")
+
+type Record = dict[str, Any]
+
+# Built once; requests only bind their values
+known_races = select(Race.race_id).where(
+    Race.race_id.in_(bindparam("ids", expanding=True)),
+)
+known_drivers = select(Driver.driver_id).where(
+    Driver.driver_id.in_(bindparam("ids", expanding=True)),
+)
+
+
+def unknown_references(records: list[Record]) -> dict[str, list[int]]:
+    """Find the race and driver IDs of records that do not exist."""
+    unknown = {}
+    with Session(engine) as session:
+        for column, statement in (
+            ("race_id", known_races),
+            ("driver_id", known_drivers),
+        ):
+            ids = {record[column] for record in records}
+            found = set(session.exec(statement, params={"ids": list(ids)}))
+            if ids - found:
+                unknown[column] = sorted(ids - found)
+    return unknown
+
+
+def upsert_lap_times(session: Session, rows: Iterable[Record]) -> None:
+    """Insert lap times, replacing those already stored for the same lap."""
+    # The last update of a lap wins; Postgres rejects a statement touching
+    # the same row twice
+    latest = {tuple(row[key] for key in LAP_TIME_KEY): row for row in rows}
+    if not latest:
+        return
+    dialect = session.get_bind().dialect.name
+    insert = postgresql.insert if dialect == "postgresql" else sqlite.insert
+    statement = insert(LapTime)
+    statement = statement.on_conflict_do_update(
+        index_elements=list(LAP_TIME_KEY),
+        set_={
+            name: statement.excluded[name]
+            for name in ("position", "time", "milliseconds")
+        },
+    )
+    session.connection().execute(statement, list(latest.values()))
+
+
+def write_lap_times(rows: list[Record]) -> None:
+    """Write a batch of lap times in one transaction."""
+    watcher.check()
+    with Session(engine) as session:
+        upsert_lap_times(session, rows)
+        session.commit()
+
+
+def write_batch(rows: list[Record]) -> list[Record]:
+    """Write a batch of lap times, bisecting it around failing records.
+
+    Returns the records that could not be written.
+    """
+    try:
+        write_lap_times(rows)
+    except (DataError, IntegrityError):
+        if len(rows) == 1:
+            logger.exception("Failed to write lap time %s", rows[0])
+            return rows
+        middle = len(rows) // 2
+        return write_batch(rows[:middle]) + write_batch(rows[middle:])
+    return []
+
+
+@dataclass
+class IngestStats:
+    """Counters of the ingest writer."""
+
+    queue_size: int
+    queued: int = 0
+    accepted: int = 0
+    rejected: int = 0
+    written: int = 0
+    failed: int = 0
+    batches: int = 0
+    max_batch: int = 0
+
+
+class IngestWriter:
+    """Bounded queue of ingested records drained by one writer task."""
+
+    def __init__(
+        self,
+        queue_size: int,
+        batch_size: int,
+        flush_interval: float,
+    ) -> None:
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.stats = IngestStats(queue_size)
+        self._queue: asyncio.Queue[Record] | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start the writer task on the running event loop."""
+        self._queue = asyncio.Queue(self.stats.queue_size)
+        self._task = asyncio.create_task(self._run(self._queue))
+
+    async def stop(self) -> None:
+        """Write the queued records, then stop the writer task."""
+        if self._queue is None or self._task is None:
+            return
+        queue, task = self._queue, self._task
+        self._queue = None
+        await queue.join()
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+
+    def submit(self, records: list[Record]) -> bool:
+        """Queue all of the records, or none if they do not fit."""
+        queue = self._queue
+        if queue is None or queue.maxsize - queue.qsize() < len(records):
+            self.stats.rejected += len(records)
+            return False
+        for record in records:
+            queue.put_nowait(record)
+        self.stats.accepted += len(records)
+        self.stats.queued = queue.qsize()
+        return True
+
+    async def _run(self, queue: asyncio.Queue[Record]) -> None:
+        """Collect batches from the queue and write them."""
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), timeout))
+                except TimeoutError:
+                    break
+            await self._flush(queue, batch)
+
+    async def _flush(
+        self,
+        queue: asyncio.Queue[Record],
+        batch: list[Record],
+    ) -> None:
+        """Write a batch outside the event loop and the request threadpool."""
+        stats = self.stats
+        # Held while the database is reloaded, then written to the new file
+        await watcher.writes_resumed()
+        try:
+            failed = await asyncio.to_thread(write_batch, batch)
+        except Exception:
+            logger.exception("Failed to write %d lap times", len(batch))
+            stats.failed += len(batch)
+        else:
+            stats.written += len(batch) - len(failed)
+            stats.failed += len(failed)
+            stats.batches += 1
+            stats.max_batch = max(stats.max_batch, len(batch))
+            table_versions.bump(
+                LapTime.__tablename__,
+                *{
+                    race_rows(LapTime.__tablename__, record["race_id"])
+                    for record in batch
+                },
+            )
+        finally:
+            for _ in batch:
+                queue.task_done()
+            stats.queued = queue.qsize()
+
+
+writer = IngestWriter(
+    INGEST_QUEUE_SIZE,
+    INGEST_BATCH_SIZE,
+    INGEST_FLUSH_INTERVAL,
+)
+
+
+def ingest_stats() -> dict[str, int]:
+    """Get the ingest writer counters."""
+    return asdict(writer.stats)
@@ -0,0 +1,63 @@
+"""Parsing of lap time and speed strings into typed columns."""
+
+import re
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import polars as pl
+
+# "1:23.456", "83.456" or "1:23"; the minutes are optional
+LAP_TIME_PATTERN = r"^(?:(\d+):)?(\d+(?:\.\d+)?)$"
+
+_lap_time = re.compile(LAP_TIME_PATTERN)
+
+
+def lap_time_ms(value: str | None) -> int | None:
+    """Parse a lap time such as "1:23.456" into milliseconds."""
+    match = _lap_time.match(value.strip()) if value else None
+    if not match:
+        return None
+    minutes, seconds = match.groups()
+    return round((int(minutes or 0) * 60 + float(seconds)) * 1000)
+
+
+def lap_speed(value: str | float | None) -> float | None:
+    """Parse a lap speed such as "210.383" in km/h."""
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def lap_time_ms_expr(column: str) -> "pl.Expr":
+    """Build a Polars expression parsing a lap time column to milliseconds."""
+    # Imported on first use to keep Polars out of worker startup
+    import polars as pl  # noqa: PLC0415
+
+    lap_time = pl.col(column).cast(pl.String).str.strip_chars()
+    minutes = lap_time.str.extract(LAP_TIME_PATTERN, 1).cast(pl.Int64)
+    seconds = lap_time.str.extract(LAP_TIME_PATTERN, 2).cast(pl.Float64)
+    return (
+        ((minutes.fill_null(0) * 60 + seconds) * 1000).round().cast(pl.Int64)
+    )
+
+
+def qualifying_time_values(values: dict[str, Any]) -> dict[str, Any]:
+    """Add the millisecond columns of the q1/q2/q3 strings being written."""
+    return values | {
+        f"{column}_ms": lap_time_ms(values[column])
+        for column in ("q1", "q2", "q3")
+        if column in values
+    }
+
+
+def result_time_values(values: dict[str, Any]) -> dict[str, Any]:
+    """Add the typed fastest lap columns of the strings being written."""
+    values = dict(values)
+    if "fastest_lap_time" in values:
+        values["fastest_lap_time_ms"] = lap_time_ms(values["fastest_lap_time"])
+    if "fastest_lap_speed" in values:
+        values["fastest_lap_speed_kph"] = lap_speed(
+            values["fastest_lap_speed"],
+        )
+    return values
@@ -1,16 +1,45 @@
 """Data loader to populate the database with CSV data."""
 
+import os
 import sys
+from collections.abc import Callable
 from datetime import UTC, date, datetime
 from datetime import time as time_type
+from typing import Any
 
 import polars as pl
-from sqlmodel import Session
+from sqlalchemy import Engine
+from sqlalchemy.exc import DBAPIError
+from sqlmodel import Session, SQLModel, create_engine, select
 
 sys.path.append("..")  # Ensure src is in the path for imports
 
-from src.database import create_db_and_tables, engine
-from src.models import Circuit, Constructor, Driver, Qualifying, Race, Result
+from src.database import DATABASE_URL, create_db_and_tables, engine
+from src.hotswap import WritePause, publish_database, sqlite_path
+from src.ingest import upsert_lap_times
+from src.laptimes import lap_time_ms_expr
+from src.models import (
+    Circuit,
+    Constructor,
+    Driver,
+    FrozenSeason,
+    LapTime,
+    PitStop,
+    Qualifying,
+    QualifyingWide,
+    Race,
+    Result,
+    ResultWide,
+    SprintResult,
+)
+from src.readmodels import rebuild_wide_tables
+from src.routers.seasons import frozen_snapshot_keys, render_frozen_seasons
+from src.staging import csv_available, scan_table
+
+LAP_TIMES_CHUNK_SIZE = 10000
+
+# Compact the rebuilt database with VACUUM INTO before swapping it in
+LOAD_VACUUM = os.getenv("LOAD_VACUUM", "1") != "0"
 
 
 def safe_date_parse(date_str: str | None) -> date | None:
@@ -33,146 +62,279 @@ def safe_time_parse(time_str: str | None) -> time_type | None:
         return None
 
 
-def load_csv_data() -> None:
-    """Load data from CSV files into the database."""
-    print("Loading data from CSV files...")
+# Model fields loaded from each CSV file, as their CSV columns or Polars
+# expressions; only these columns are read from the staged Parquet files
+type Columns = dict[str, str | pl.Expr]
+type Parsers = dict[str, Callable[[Any], Any]]
 
-    create_db_and_tables()
-    with Session(engine) as session:
-        # Load drivers
-        print("Loading drivers...")
-        drivers_df = pl.read_csv("data/drivers.csv", null_values=["\\N"])
-
-        for row in drivers_df.iter_rows(named=True):
-            driver = Driver(
-                driver_id=row["driverId"],
-                driver_ref=row["driverRef"],
-                number=row["number"],
-                code=row["code"],
-                forename=row["forename"],
-                surname=row["surname"],
-                dob=safe_date_parse(row["dob"]),
-                nationality=row["nationality"],
-                url=row["url"],
-            )
-            session.merge(driver)
-
-        # Load circuits
-        print("Loading circuits...")
-        circuits_df = pl.read_csv("data/circuits.csv", null_values=["\\N"])
-
-        for row in circuits_df.iter_rows(named=True):
-            circuit = Circuit(
-                circuit_id=row["circuitId"],
-                circuit_ref=row["circuitRef"],
-                name=row["name"],
-                location=row["location"],
-                country=row["country"],
-                lat=row["lat"],
-                lng=row["lng"],
-                alt=row["alt"],
-                url=row["url"],
-            )
-            session.merge(circuit)
+DRIVER_COLUMNS: Columns = {
+    "driver_id": "driverId",
+    "driver_ref": "driverRef",
+    "number": "number",
+    "code": "code",
+    "forename": "forename",
+    "surname": "surname",
+    "dob": "dob",
+    "nationality": "nationality",
+    "url": "url",
+}
+CIRCUIT_COLUMNS: Columns = {
+    "circuit_id": "circuitId",
+    "circuit_ref": "circuitRef",
+    "name": "name",
+    "location": "location",
+    "country": "country",
+    "lat": "lat",
+    "lng": "lng",
+    "alt": "alt",
+    "url": "url",
+}
+CONSTRUCTOR_COLUMNS: Columns = {
+    "constructor_id": "constructorId",
+    "constructor_ref": "constructorRef",
+    "name": "name",
+    "nationality": "nationality",
+    "url": "url",
+}
+RACE_COLUMNS: Columns = {
+    "race_id": "raceId",
+    "year": "year",
+    "round": "round",
+    "circuit_id": "circuitId",
+    "name": "name",
+    "date": "date",
+    "time": "time",
+    "url": "url",
+    **{
+        f"{session}_{part}": f"{session}_{part}"
+        for session in ("fp1", "fp2", "fp3", "quali", "sprint")
+        for part in ("date", "time")
+    },
+}
+RESULT_COLUMNS: Columns = {
+    "result_id": "resultId",
+    "race_id": "raceId",
+    "driver_id": "driverId",
+    "constructor_id": "constructorId",
+    "number": "number",
+    "grid": "grid",
+    "position": "position",
+    "position_text": "positionText",
+    "position_order": "positionOrder",
+    "points": "points",
+    "laps": "laps",
+    "time": "time",
+    "milliseconds": "milliseconds",
+    "fastest_lap": "fastestLap",
+    "rank": "rank",
+    "fastest_lap_time": "fastestLapTime",
+    "fastest_lap_speed": "fastestLapSpeed",
+    "fastest_lap_time_ms": lap_time_ms_expr("fastestLapTime"),
+    "fastest_lap_speed_kph": pl.col("fastestLapSpeed").cast(
+        pl.Float64,
+        strict=False,
+    ),
+    "status_id": "statusId",
+}
+QUALIFYING_COLUMNS: Columns = {
+    "qualify_id": "qualifyId",
+    "race_id": "raceId",
+    "driver_id": "driverId",
+    "constructor_id": "constructorId",
+    "number": "number",
+    "position": "position",
+    "q1": "q1",
+    "q2": "q2",
+    "q3": "q3",
+    "q1_ms": lap_time_ms_expr("q1"),
+    "q2_ms": lap_time_ms_expr("q2"),
+    "q3_ms": lap_time_ms_expr("q3"),
+}
+SPRINT_RESULT_COLUMNS: Columns = {
+    field: column
+    for field, column in RESULT_COLUMNS.items()
+    if field in SprintResult.model_fields and isinstance(column, str)
+}
+PIT_STOP_COLUMNS: Columns = {
+    "race_id": "raceId",
+    "driver_id": "driverId",
+    "stop": "stop",
+    "lap": "lap",
+    "time": "time",
+    "duration": "duration",
+    "milliseconds": "milliseconds",
+}
+LAP_TIME_COLUMNS: Columns = {
+    "race_id": "raceId",
+    "driver_id": "driverId",
+    "lap": "lap",
+    "position": "position",
+    "time": "time",
+    "milliseconds": "milliseconds",
+}
 
-        # Load constructors
-        print("Loading constructors...")
-        constructors_df = pl.read_csv(
-            "data/constructors.csv",
-            null_values=["\\N"],
-        )
+# Parsers of the date and time strings, which Python reads more leniently
+# than Polars
+DRIVER_PARSERS = {"dob": safe_date_parse}
+RACE_PARSERS = {
+    field: safe_date_parse if field.endswith("date") else safe_time_parse
+    for field in RACE_COLUMNS
+    if field.endswith(("date", "time"))
+}
 
-        for row in constructors_df.iter_rows(named=True):
-            constructor = Constructor(
-                constructor_id=row["constructorId"],
-                constructor_ref=row["constructorRef"],
-                name=row["name"],
-                nationality=row["nationality"],
-                url=row["url"],
-            )
-            session.merge(constructor)
-
-        # Load races
-        print("Loading races...")
-        races_df = pl.read_csv("data/races.csv", null_values=["\\N"])
-
-        for row in races_df.iter_rows(named=True):
-            race = Race(
-                race_id=row["raceId"],
-                year=row["year"],
-                round=row["round"],
-                circuit_id=row["circuitId"],
-                name=row["name"],
-                date=safe_date_parse(row["date"]),
-                time=safe_time_parse(row["time"]),
-                url=row["url"],
-                fp1_date=safe_date_parse(row["fp1_date"]),
-                fp1_time=safe_time_parse(row["fp1_time"]),
-                fp2_date=safe_date_parse(row["fp2_date"]),
-                fp2_time=safe_time_parse(row["fp2_time"]),
-                fp3_date=safe_date_parse(row["fp3_date"]),
-                fp3_time=safe_time_parse(row["fp3_time"]),
-                quali_date=safe_date_parse(row["quali_date"]),
-                quali_time=safe_time_parse(row["quali_time"]),
-                sprint_date=safe_date_parse(row["sprint_date"]),
-                sprint_time=safe_time_parse(row["sprint_time"]),
-            )
-            session.merge(race)
-
-        # Load results (sample first 1000 for performance)
-        print("Loading results...")
-        results_df = pl.read_csv(
-            "data/results.csv",
-            null_values=["\\N"],
-            infer_schema_length=None,
+
+def read_table(name: str, columns: Columns) -> pl.DataFrame:
+    """Read the given columns of a staged CSV, named after model fields."""
+    return (
+        scan_table(name)
+        .select(
+            **{
+                field: pl.col(column) if isinstance(column, str) else column
+                for field, column in columns.items()
+            },
         )
+        .collect()
+    )
+
+
+def merge_table(
+    session: Session,
+    model: type[SQLModel],
+    name: str,
+    columns: Columns,
+    parsers: Parsers | None = None,
+) -> int:
+    """Merge the rows of a staged CSV into a table and count them."""
+    print(f"Loading {name.replace('_', ' ')}...")
+    frame = read_table(name, columns)
+    for row in frame.iter_rows(named=True):
+        for field, parse in (parsers or {}).items():
+            row[field] = parse(row[field])
+        session.merge(model(**row))
+    return frame.height
 
-        for row in results_df.iter_rows(named=True):
-            result = Result(
-                result_id=row["resultId"],
-                race_id=row["raceId"],
-                driver_id=row["driverId"],
-                constructor_id=row["constructorId"],
-                number=row["number"],
-                grid=row["grid"],
-                position=row["position"],
-                position_text=row["positionText"],
-                position_order=row["positionOrder"],
-                points=row["points"],
-                laps=row["laps"],
-                time=row["time"],
-                milliseconds=row["milliseconds"],
-                fastest_lap=row["fastestLap"],
-                rank=row["rank"],
-                fastest_lap_time=row["fastestLapTime"],
-                fastest_lap_speed=row["fastestLapSpeed"],
-                status_id=row["statusId"],
-            )
-            session.merge(result)
 
-        # Load qualifying (sample first 1000 for performance)
-        print("Loading qualifying...")
-        qualifying_df = pl.read_csv(
-            "data/qualifying.csv",
-            null_values=["\\N"],
+def insert_lap_times(session: Session) -> int:
+    """Insert the lap times in bulk and count them.
+
+    There are hundreds of thousands of them, so they are upserted in chunks
+    rather than merged one by one.
+    """
+    print("Loading lap times...")
+    frame = read_table("lap_times", LAP_TIME_COLUMNS)
+    for chunk in frame.iter_slices(LAP_TIMES_CHUNK_SIZE):
+        upsert_lap_times(session, chunk.to_dicts())
+    return frame.height
+
+
+def load_tables(bind: Engine) -> dict[str, int]:
+    """Load the CSV data into a database and count the rows loaded."""
+    tables: list[tuple[type[SQLModel], str, Columns, Parsers | None]] = [
+        (Driver, "drivers", DRIVER_COLUMNS, DRIVER_PARSERS),
+        (Circuit, "circuits", CIRCUIT_COLUMNS, None),
+        (Constructor, "constructors", CONSTRUCTOR_COLUMNS, None),
+        (Race, "races", RACE_COLUMNS, RACE_PARSERS),
+        (Result, "results", RESULT_COLUMNS, None),
+        (Qualifying, "qualifying", QUALIFYING_COLUMNS, None),
+    ]
+    # Older copies of the dataset have no sprint results or pit stops
+    tables.extend(
+        table
+        for table in (
+            (SprintResult, "sprint_results", SPRINT_RESULT_COLUMNS, None),
+            (PitStop, "pit_stops", PIT_STOP_COLUMNS, None),
         )
+        if csv_available(table[1])
+    )
 
-        for row in qualifying_df.iter_rows(named=True):
-            qualifying = Qualifying(
-                qualify_id=row["qualifyId"],
-                race_id=row["raceId"],
-                driver_id=row["driverId"],
-                constructor_id=row["constructorId"],
-                number=row["number"],
-                position=row["position"],
-                q1=row["q1"],
-                q2=row["q2"],
-                q3=row["q3"],
+    counts: dict[str, int] = {}
+    with Session(bind) as session:
+        for model, name, columns, parsers in tables:
+            counts[model.__tablename__] = merge_table(
+                session,
+                model,
+                name,
+                columns,
+                parsers,
             )
-            session.merge(qualifying)
+        # The races and drivers the lap times refer to are flushed first
+        session.flush()
+        counts[LapTime.__tablename__] = insert_lap_times(session)
+
+        print("Building wide read tables...")
+        rebuild_wide_tables(session)
+        counts[ResultWide.__tablename__] = counts[Result.__tablename__]
+        counts[QualifyingWide.__tablename__] = counts[Qualifying.__tablename__]
 
         session.commit()
+    return counts
+
+
+def copy_frozen_seasons(build: Engine) -> None:
+    """Keep the seasons frozen in the served database frozen in the build."""
+    with Session(engine) as live, Session(build) as session:
+        try:
+            frozen = live.exec(select(FrozenSeason)).all()
+        except DBAPIError:
+            # The served database has not been created yet
+            return
+        for season in frozen:
+            session.merge(FrozenSeason.model_validate(season))
+        session.commit()
+
+
+def previous_snapshot_keys() -> list[str]:
+    """Get the snapshot keys of the seasons frozen in the served database."""
+    with Session(engine) as session:
+        try:
+            return frozen_snapshot_keys(session)
+        except DBAPIError:
+            # The served database has not been created yet
+            return []
+
+
+def refresh_snapshots(previous_keys: list[str]) -> None:
+    """Render the frozen seasons of the loaded data again."""
+    print("Rendering frozen seasons...")
+    with Session(engine) as session:
+        render_frozen_seasons(session, previous_keys)
+
+
+def load_csv_data() -> None:
+    """Load data from CSV files into the database.
+
+    A SQLite database is built in a new file and swapped in for the served
+    one once complete, so running API workers never see half-loaded tables,
+    see src/hotswap.py. Other databases are loaded in place.
+    """
+    print("Loading data from CSV files...")
+
+    target = sqlite_path(DATABASE_URL)
+    if target is None:
+        previous_keys = previous_snapshot_keys()
+        create_db_and_tables()
+        load_tables(engine)
+        refresh_snapshots(previous_keys)
         print("Data loading completed!")
+        return
+
+    # API writes are paused until the new file is in place, as writes to the
+    # served one would be lost with it
+    with WritePause(target) as pause:
+        build_path = target.with_name(f"{target.name}.build")
+        build_path.unlink(missing_ok=True)
+        build = create_engine(f"sqlite:///{build_path}")
+        create_db_and_tables(build)
+        counts = load_tables(build)
+        copy_frozen_seasons(build)
+        previous_keys = previous_snapshot_keys()
+
+        print("Verifying and swapping in the new database...")
+        publish_database(build, pause, counts, vacuum=LOAD_VACUUM)
+    # Connections opened so far are to the replaced file
+    engine.dispose()
+    refresh_snapshots(previous_keys)
+    print("Data loading completed!")
 
 
 if __name__ == "__main__":
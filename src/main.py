@@ -1,17 +1,42 @@
 from collections.abc import AsyncGenerator
 from contextlib import asynccontextmanager
 
+import anyio.to_thread
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from src.database import create_db_and_tables
+from src.admission import (
+    ADMISSION_CONCURRENCY,
+    AdmissionControl,
+    admission_stats,
+)
+from src.coalescing import RequestCoalescer, coalescing_stats
+from src.database import (
+    DATABASE_MAX_OVERFLOW,
+    create_db_and_tables,
+    prewarm,
+)
+from src.hotswap import watcher
+from src.ingest import ingest_stats, writer
+from src.models import Circuit, Constructor, Driver, Qualifying, Race, Result
+from src.ratelimit import RateLimiter, rate_limit_stats
 from src.routers import (
+    analytics,
     circuits,
     constructors,
     drivers,
+    laps,
     qualifying,
     races,
     results,
+    seasons,
+    stream,
+)
+from src.startup import (
+    FirstRequestTimer,
+    mark_imported,
+    mark_started,
+    timings,
 )
 
 
@@ -19,9 +44,19 @@ from src.routers import (
 async def lifespan(_: FastAPI) -> AsyncGenerator[None]:
     """Application lifespan manager."""
     # Startup
+    # Threads for every admitted request plus the unmanaged routes, matching
+    # the database pool size and overflow
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    limiter.total_tokens = ADMISSION_CONCURRENCY + DATABASE_MAX_OVERFLOW
     create_db_and_tables()
+    prewarm([Driver, Circuit, Constructor, Race, Result, Qualifying])
+    writer.start()
+    watcher.start()
+    mark_started()
     yield
-    # Shutdown (add any cleanup code here if needed)
+    # Shutdown
+    await watcher.stop()
+    await writer.stop()
 
 
 app = FastAPI(
@@ -36,7 +71,14 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
-# Add CORS middleware
+app.add_middleware(AdmissionControl)
+# Outside admission control so coalesced requests do not take a slot
+app.add_middleware(RequestCoalescer)
+app.add_middleware(FirstRequestTimer)
+# Outside the rest, so requests over their client's limit cost nothing else
+app.add_middleware(RateLimiter)
+# Outermost, so the 429 and 503 answers of the limiters carry CORS headers
+# and preflights are answered before reaching them
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -57,6 +99,10 @@ app.include_router(
 )
 app.include_router(results.router, prefix="/api/v1", tags=["results"])
 app.include_router(qualifying.router, prefix="/api/v1", tags=["qualifying"])
+app.include_router(seasons.router, prefix="/api/v1", tags=["seasons"])
+app.include_router(stream.router, prefix="/api/v1", tags=["stream"])
+app.include_router(laps.router, prefix="/api/v1", tags=["laps"])
+app.include_router(analytics.router, prefix="/api/v1", tags=["analytics"])
 
 
 @app.get("/")
@@ -76,6 +122,38 @@ async def health_check() -> dict[str, str]:
     return {"status": "healthy", "service": "F1 API"}
 
 
+@app.get("/health/startup")
+async def startup_timings() -> dict[str, float | None]:
+    """Get import, startup and time-to-first-request in milliseconds."""
+    return timings.as_milliseconds()
+
+
+@app.get("/metrics/admission")
+async def admission_metrics() -> dict[str, dict[str, int]]:
+    """Get in-flight, queued and rejected requests per route class."""
+    return admission_stats()
+
+
+@app.get("/metrics/coalescing")
+async def coalescing_metrics() -> dict[str, int]:
+    """Get how many GET requests were collapsed into in-flight ones."""
+    return coalescing_stats()
+
+
+@app.get("/metrics/ingest")
+async def ingest_metrics() -> dict[str, int]:
+    """Get queued, written and rejected lap times of the ingest writer."""
+    return ingest_stats()
+
+
+@app.get("/metrics/ratelimit")
+def rate_limit_metrics() -> dict[str, int]:
+    """Get allowed and rate limited requests and the clients tracked."""
+    return rate_limit_stats()
+
+
+mark_imported()
+
 if __name__ == "__main__":
     import uvicorn
 
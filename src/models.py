@@ -1,6 +1,8 @@
 from datetime import date as date_type
+from datetime import datetime
 from datetime import time as time_type
 
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel
 
 
@@ -13,7 +15,7 @@ class DriverBase(SQLModel):
     forename: str
     surname: str
     dob: date_type | None = None
-    nationality: str
+    nationality: str = Field(index=True)
     url: str | None = None
 
 
@@ -52,7 +54,7 @@ class CircuitBase(SQLModel):
     circuit_ref: str = Field(index=True)
     name: str
     location: str
-    country: str
+    country: str = Field(index=True)
     lat: float | None = None
     lng: float | None = None
     alt: int | None = None
@@ -75,6 +77,12 @@ class CircuitRead(CircuitBase):
     circuit_id: int
 
 
+class CircuitDistanceRead(CircuitRead):
+    """Model for reading a circuit with its distance from a point."""
+
+    distance_km: float
+
+
 class CircuitUpdate(SQLModel):
     """Model for updating circuit data."""
 
@@ -93,7 +101,7 @@ class ConstructorBase(SQLModel):
 
     constructor_ref: str = Field(index=True)
     name: str
-    nationality: str
+    nationality: str = Field(index=True)
     url: str | None = None
 
 
@@ -127,7 +135,7 @@ class RaceBase(SQLModel):
 
     year: int = Field(index=True)
     round: int
-    circuit_id: int = Field(foreign_key="circuit.circuit_id")
+    circuit_id: int = Field(foreign_key="circuit.circuit_id", index=True)
     name: str
     date: date_type | None = None
     time: time_type | None = None
@@ -185,9 +193,12 @@ class RaceUpdate(SQLModel):
 class ResultBase(SQLModel):
     """Base model for Result."""
 
-    race_id: int = Field(foreign_key="race.race_id")
-    driver_id: int = Field(foreign_key="driver.driver_id")
-    constructor_id: int = Field(foreign_key="constructor.constructor_id")
+    race_id: int = Field(foreign_key="race.race_id", index=True)
+    driver_id: int = Field(foreign_key="driver.driver_id", index=True)
+    constructor_id: int = Field(
+        foreign_key="constructor.constructor_id",
+        index=True,
+    )
     number: int | None = None
     grid: int | None = None
     position: int | None = None
@@ -207,7 +218,14 @@ class ResultBase(SQLModel):
 class Result(ResultBase, table=True):
     """Result table model."""
 
+    # Matches a driver's race to another driver's in driver comparisons
+    __table_args__ = (
+        Index("ix_result_driver_id_race_id", "driver_id", "race_id"),
+    )
+
     result_id: int | None = Field(default=None, primary_key=True)
+    fastest_lap_time_ms: int | None = Field(default=None, index=True)
+    fastest_lap_speed_kph: float | None = Field(default=None, index=True)
 
 
 class ResultCreate(ResultBase):
@@ -218,6 +236,8 @@ class ResultRead(ResultBase):
     """Model for reading result data."""
 
     result_id: int
+    fastest_lap_time_ms: int | None = None
+    fastest_lap_speed_kph: float | None = None
 
 
 class ResultUpdate(SQLModel):
@@ -245,9 +265,12 @@ class ResultUpdate(SQLModel):
 class QualifyingBase(SQLModel):
     """Base model for Qualifying."""
 
-    race_id: int = Field(foreign_key="race.race_id")
-    driver_id: int = Field(foreign_key="driver.driver_id")
-    constructor_id: int = Field(foreign_key="constructor.constructor_id")
+    race_id: int = Field(foreign_key="race.race_id", index=True)
+    driver_id: int = Field(foreign_key="driver.driver_id", index=True)
+    constructor_id: int = Field(
+        foreign_key="constructor.constructor_id",
+        index=True,
+    )
     number: int
     position: int | None = None
     q1: str | None = None
@@ -258,7 +281,14 @@ class QualifyingBase(SQLModel):
 class Qualifying(QualifyingBase, table=True):
     """Qualifying table model."""
 
+    __table_args__ = (
+        Index("ix_qualifying_driver_id_race_id", "driver_id", "race_id"),
+    )
+
     qualify_id: int | None = Field(default=None, primary_key=True)
+    q1_ms: int | None = Field(default=None, index=True)
+    q2_ms: int | None = Field(default=None, index=True)
+    q3_ms: int | None = Field(default=None, index=True)
 
 
 class QualifyingCreate(QualifyingBase):
@@ -269,6 +299,9 @@ class QualifyingRead(QualifyingBase):
     """Model for reading qualifying data."""
 
     qualify_id: int
+    q1_ms: int | None = None
+    q2_ms: int | None = None
+    q3_ms: int | None = None
 
 
 class QualifyingUpdate(SQLModel):
@@ -282,3 +315,274 @@ class QualifyingUpdate(SQLModel):
     q1: str | None = None
     q2: str | None = None
     q3: str | None = None
+
+
+class ResultWideBase(ResultBase):
+    """Base model for ResultWide."""
+
+    fastest_lap_time_ms: int | None = Field(default=None, index=True)
+    fastest_lap_speed_kph: float | None = Field(default=None, index=True)
+    driver_code: str | None = None
+    driver_forename: str | None = None
+    driver_surname: str | None = None
+    constructor_name: str | None = None
+    race_year: int | None = Field(default=None, index=True)
+    race_round: int | None = None
+    race_name: str | None = None
+    circuit_id: int | None = Field(default=None, index=True)
+    circuit_name: str | None = None
+
+
+class ResultWide(ResultWideBase, table=True):
+    """Result joined with its driver, constructor, race and circuit names.
+
+    Maintained from the normalized tables by src/readmodels.py.
+    """
+
+    __tablename__ = "result_wide"
+
+    result_id: int = Field(primary_key=True)
+
+
+class ResultWideRead(ResultWideBase):
+    """Model for reading denormalized result data."""
+
+    result_id: int
+
+
+class QualifyingWideBase(QualifyingBase):
+    """Base model for QualifyingWide."""
+
+    q1_ms: int | None = Field(default=None, index=True)
+    q2_ms: int | None = Field(default=None, index=True)
+    q3_ms: int | None = Field(default=None, index=True)
+    driver_code: str | None = None
+    driver_forename: str | None = None
+    driver_surname: str | None = None
+    constructor_name: str | None = None
+    race_year: int | None = Field(default=None, index=True)
+    race_round: int | None = None
+    race_name: str | None = None
+    circuit_id: int | None = Field(default=None, index=True)
+    circuit_name: str | None = None
+
+
+class QualifyingWide(QualifyingWideBase, table=True):
+    """Qualifying joined with its driver, constructor, race and circuit names.
+
+    Maintained from the normalized tables by src/readmodels.py.
+    """
+
+    __tablename__ = "qualifying_wide"
+
+    qualify_id: int = Field(primary_key=True)
+
+
+class QualifyingWideRead(QualifyingWideBase):
+    """Model for reading denormalized qualifying data."""
+
+    qualify_id: int
+
+
+class LapTimeBase(SQLModel):
+    """Base model for LapTime."""
+
+    race_id: int
+    driver_id: int
+    lap: int = Field(ge=1)
+    position: int | None = None
+    time: str | None = None
+    milliseconds: int | None = None
+
+
+class LapTime(LapTimeBase, table=True):
+    """Lap time table model."""
+
+    __tablename__ = "lap_time"
+
+    race_id: int = Field(foreign_key="race.race_id", primary_key=True)
+    driver_id: int = Field(foreign_key="driver.driver_id", primary_key=True)
+    lap: int = Field(primary_key=True)
+
+
+class LapTimeCreate(LapTimeBase):
+    """Model for ingesting a lap time."""
+
+
+class LapTimeRead(LapTimeBase):
+    """Model for reading lap time data."""
+
+
+class SprintResult(SQLModel, table=True):
+    """Sprint result table model."""
+
+    __tablename__ = "sprint_result"
+
+    result_id: int | None = Field(default=None, primary_key=True)
+    race_id: int = Field(foreign_key="race.race_id", index=True)
+    driver_id: int = Field(foreign_key="driver.driver_id", index=True)
+    constructor_id: int = Field(
+        foreign_key="constructor.constructor_id",
+        index=True,
+    )
+    number: int | None = None
+    grid: int | None = None
+    position: int | None = None
+    position_text: str
+    position_order: int
+    points: float
+    laps: int
+    time: str | None = None
+    milliseconds: int | None = None
+    fastest_lap: int | None = None
+    fastest_lap_time: str | None = None
+    status_id: int
+
+
+class PitStop(SQLModel, table=True):
+    """Pit stop table model."""
+
+    __tablename__ = "pit_stop"
+
+    race_id: int = Field(foreign_key="race.race_id", primary_key=True)
+    driver_id: int = Field(foreign_key="driver.driver_id", primary_key=True)
+    stop: int = Field(primary_key=True)
+    lap: int
+    time: str | None = None
+    duration: str | None = None
+    milliseconds: int | None = None
+
+
+class RaceWeekendRead(SQLModel):
+    """Model for reading a race with its circuit, qualifying and results."""
+
+    race: RaceRead
+    circuit: CircuitRead
+    qualifying: list[QualifyingRead]
+    results: list[ResultRead]
+
+
+class PointsSystem(SQLModel):
+    """Model for a points system to recompute the championships with."""
+
+    # Points for first, second, ... place of a race
+    points: list[float] = Field(min_length=1, max_length=40)
+    fastest_lap_points: float = Field(default=0, ge=0)
+    # Only drivers finishing this high score the fastest lap point
+    fastest_lap_max_position: int | None = Field(default=None, ge=1)
+    # Points for first, second, ... place of a sprint
+    sprint_points: list[float] = Field(default_factory=list, max_length=40)
+    # Number of standings returned per season and championship
+    top: int = Field(default=3, ge=1, le=50)
+
+
+class StandingRead(SQLModel):
+    """Model for reading a driver or constructor championship standing."""
+
+    id: int
+    name: str | None = None
+    points: float
+    wins: int
+
+
+class SeasonStandingsRead(SQLModel):
+    """Model for reading the top championship standings of a season."""
+
+    year: int
+    drivers: list[StandingRead]
+    constructors: list[StandingRead]
+
+
+class SeasonComparisonRead(SQLModel):
+    """Model for reading two drivers' head-to-head in one season."""
+
+    year: int
+    races: int
+    race_wins: int
+    race_losses: int
+    qualifying_sessions: int
+    qualifying_wins: int
+    qualifying_losses: int
+    # Points scored in the races both drivers took part in
+    points: float
+    other_points: float
+
+
+class DriverComparisonRead(SQLModel):
+    """Model for reading the head-to-head record of two drivers."""
+
+    driver_id: int
+    other_driver_id: int
+    races: int
+    race_wins: int
+    race_losses: int
+    qualifying_sessions: int
+    qualifying_wins: int
+    qualifying_losses: int
+    # Mean of the driver's finishing place minus the other driver's, so
+    # negative when the driver usually finished ahead
+    average_position_gap: float | None = None
+    seasons: list[SeasonComparisonRead]
+
+
+class LapPaceRead(SQLModel):
+    """Model for reading a lap of a driver compared with the leader."""
+
+    lap: int
+    milliseconds: int
+    position: int | None = None
+    # Time behind the race leader at the end of the lap
+    gap_ms: int
+    # Lap time minus the race leader's time on the same lap
+    delta_ms: int
+
+
+class StintRead(SQLModel):
+    """Model for reading a driver's laps between two pit stops."""
+
+    stint: int
+    start_lap: int
+    end_lap: int
+    laps: int
+    median_ms: float | None = None
+    # Lap time lost per lap over the stint, without in, out and slow laps
+    degradation_ms_per_lap: float | None = None
+
+
+class DriverPaceRead(SQLModel):
+    """Model for reading the lap time distribution of a driver in a race."""
+
+    driver_id: int
+    driver_code: str | None = None
+    driver_name: str | None = None
+    laps: int
+    median_ms: float
+    p10_ms: float
+    p90_ms: float
+    stints: list[StintRead]
+    lap_times: list[LapPaceRead]
+
+
+class RacePaceRead(SQLModel):
+    """Model for reading the pace of every driver in a race."""
+
+    race_id: int
+    drivers: list[DriverPaceRead]
+
+
+class FrozenSeason(SQLModel, table=True):
+    """Season whose GET responses are served from pre-rendered snapshots."""
+
+    __tablename__ = "frozen_season"
+
+    year: int = Field(primary_key=True)
+    frozen_at: datetime
+
+
+class SchemaVersion(SQLModel, table=True):
+    """Schema fingerprint the database tables were last created with."""
+
+    __tablename__ = "schema_version"
+
+    id: int = Field(default=1, primary_key=True)
+    fingerprint: str
@@ -0,0 +1,115 @@
+"""Paginated list envelopes with cached total counts."""
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Literal
+
+from fastapi import Request
+from pydantic import BaseModel
+from sqlmodel import Session, SQLModel, func, select
+
+from src.cache import count_cache, table_versions
+from src.filters import QueryFilters
+
+# Seconds a cached total is trusted, bounding staleness from writes made
+# through other workers
+COUNT_CACHE_TTL = float(os.getenv("COUNT_CACHE_TTL", "30"))
+
+TotalMode = Literal["exact", "approximate"]
+
+
+@dataclass
+class PageParams:
+    """Query parameters of a paginated list."""
+
+    skip: int = 0
+    limit: int = 100
+    total: TotalMode | None = None
+
+
+class Page[T](BaseModel):
+    """Model for a page of a list with its total count."""
+
+    items: list[T]
+    total: int
+    next: str | None = None
+
+
+def exact_count(
+    session: Session,
+    model: type[SQLModel],
+    filters: QueryFilters,
+) -> int:
+    """Count the rows matching the filters."""
+    statement = select(func.count()).select_from(model).where(*filters.where)
+    return session.exec(statement).one()
+
+
+def plan_rows(plan: str | bytes | list[dict[str, Any]]) -> int:
+    """Get the row estimate of an ``EXPLAIN (FORMAT JSON)`` result.
+
+    psycopg decodes the JSON itself; other drivers return it as text.
+    """
+    if isinstance(plan, str | bytes):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+def approximate_count(
+    session: Session,
+    model: type[SQLModel],
+    filters: QueryFilters,
+) -> int:
+    """Estimate the rows matching the filters without counting them.
+
+    Postgres reports the planner's row estimate. Other databases have no
+    estimate to read, so they count exactly.
+    """
+    dialect = session.get_bind().dialect
+    if dialect.name == "postgresql":
+        statement = select(model).where(*filters.where)
+        compiled = statement.compile(dialect=dialect)
+        plan = session.connection().exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}",
+            compiled.params,
+        )
+        return plan_rows(plan.scalar_one())
+    return exact_count(session, model, filters)
+
+
+def count_total(
+    session: Session,
+    model: type[SQLModel],
+    filters: QueryFilters,
+    mode: TotalMode,
+) -> int:
+    """Count the rows matching the filters, memoized per table version."""
+    table = model.__tablename__
+    key = (table, filters.key, mode)
+    version = table_versions.get(table)
+    cached = count_cache.get(key)
+    if cached and cached[0] == version and cached[1] > time.monotonic():
+        return cached[2]
+
+    if mode == "approximate":
+        total = approximate_count(session, model, filters)
+    else:
+        total = exact_count(session, model, filters)
+    count_cache.set(key, (version, time.monotonic() + COUNT_CACHE_TTL, total))
+    return total
+
+
+def paginate[T](
+    request: Request,
+    items: list[T],
+    total: int,
+    page: PageParams,
+) -> Page[T]:
+    """Wrap a page of items with its total and the link to the next one."""
+    next_url = None
+    end = page.skip + page.limit
+    if end < total:
+        next_url = str(request.url.include_query_params(skip=end))
+    return Page(items=items, total=total, next=next_url)
@@ -0,0 +1,362 @@
+"""Per-client token bucket rate limiting of the API routes.
+
+Every client has a bucket of ``burst`` tokens refilled at ``rate`` tokens a
+second. A request takes its route's cost from the bucket, heavy list and
+analytics routes costing more than cheap lookups, and is answered with 429
+and Retry-After when the bucket holds too few. Clients are told apart by
+their API key when it is one of ``RATE_LIMIT_API_KEYS``, and by their IP
+address otherwise, read from ``X-Forwarded-For`` when the request comes
+through one of ``RATE_LIMIT_TRUSTED_PROXIES``.
+
+Buckets are kept per worker, or shared by the workers of a host through a
+SQLite file when ``RATE_LIMIT_DATABASE`` is set.
+"""
+
+import asyncio
+import ipaddress
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.admission import route_class
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "1") != "0"
+# Tokens a second and bucket size of clients identified by IP address
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "10"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "100"))
+# Clients sending one of these keys in X-API-Key get their own bucket
+RATE_LIMIT_API_KEYS = frozenset(
+    key for key in os.getenv("RATE_LIMIT_API_KEYS", "").split(",") if key
+)
+RATE_LIMIT_KEY_RATE = float(os.getenv("RATE_LIMIT_KEY_RATE", "50"))
+RATE_LIMIT_KEY_BURST = float(os.getenv("RATE_LIMIT_KEY_BURST", "500"))
+RATE_LIMIT_CHEAP_COST = float(os.getenv("RATE_LIMIT_CHEAP_COST", "1"))
+RATE_LIMIT_HEAVY_COST = float(os.getenv("RATE_LIMIT_HEAVY_COST", "5"))
+# Buckets kept per worker; the least recently used are dropped beyond it
+RATE_LIMIT_MAX_CLIENTS = int(os.getenv("RATE_LIMIT_MAX_CLIENTS", "100000"))
+# SQLite file sharing the buckets between workers, unset to keep them local
+RATE_LIMIT_DATABASE = os.getenv("RATE_LIMIT_DATABASE")
+# Seconds between deletions of the shared buckets that are full again
+RATE_LIMIT_PRUNE_INTERVAL = float(
+    os.getenv("RATE_LIMIT_PRUNE_INTERVAL", "60"),
+)
+# Comma separated addresses or networks of the reverse proxies whose
+# X-Forwarded-For header is trusted, e.g. "127.0.0.1,10.0.0.0/8"
+RATE_LIMIT_TRUSTED_PROXIES = tuple(
+    ipaddress.ip_network(proxy.strip())
+    for proxy in os.getenv("RATE_LIMIT_TRUSTED_PROXIES", "").split(",")
+    if proxy.strip()
+)
+
+API_KEY_HEADER = b"x-api-key"
+FORWARDED_FOR_HEADER = b"x-forwarded-for"
+
+# Refill a shared bucket, take the cost if it is covered and return whether
+TAKE_TOKENS = (
+    "INSERT INTO rate_limit_bucket VALUES "
+    "(:client, :burst - :cost, :now, :burst >= :cost) "
+    "ON CONFLICT (client) DO UPDATE SET "
+    "tokens = min(:burst, tokens + (:now - updated) * :rate) - iif("
+    "min(:burst, tokens + (:now - updated) * :rate) >= :cost, :cost, 0), "
+    "allowed = min(:burst, tokens + (:now - updated) * :rate) >= :cost, "
+    "updated = :now "
+    "RETURNING allowed, tokens"
+)
+
+# Seconds after which any bucket has refilled from empty, and can be
+# dropped as if it had never been used
+FULL_AFTER = max(
+    RATE_LIMIT_BURST / RATE_LIMIT_RATE,
+    RATE_LIMIT_KEY_BURST / RATE_LIMIT_KEY_RATE,
+)
+PRUNE_BUCKETS = "DELETE FROM rate_limit_bucket WHERE updated < :before"
+
+# (methods, path pattern, cost) checked in order, before the costs of the
+# route classes of src/admission.py; routes of no class, or of no cost
+# here, are not limited
+ROUTE_COSTS: list[tuple[set[str], re.Pattern[str], float | None]] = [
+    # Opening a stream, which admission control leaves unmanaged
+    ({"GET"}, re.compile(r"^/api/v1/stream/"), RATE_LIMIT_CHEAP_COST),
+    # Live timing feeds post many times a second; the ingest queue bounds
+    # them instead, see src/ingest.py
+    ({"POST"}, re.compile(r"^/api/v1/ingest/"), None),
+]
+
+CLASS_COSTS = {
+    "cheap": RATE_LIMIT_CHEAP_COST,
+    "heavy": RATE_LIMIT_HEAVY_COST,
+}
+
+
+def route_cost(method: str, path: str) -> float | None:
+    """Get the tokens a route costs, or None if it is not rate limited."""
+    # CORS preflights are sent by browsers, not chosen by clients
+    if method == "OPTIONS":
+        return None
+    for methods, pattern, cost in ROUTE_COSTS:
+        if method in methods and pattern.match(path):
+            return cost
+    name = route_class(method, path)
+    return CLASS_COSTS[name] if name else None
+
+
+def is_trusted_proxy(host: str) -> bool:
+    """Check whether an address is one of the trusted reverse proxies."""
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in RATE_LIMIT_TRUSTED_PROXIES)
+
+
+def client_address(scope: Scope) -> str:
+    """Get the address of a request's client, seen through trusted proxies.
+
+    Proxies append the address they received a request from to
+    X-Forwarded-For, so the client is the last address not of a trusted
+    proxy; the earlier ones could have been sent by the client itself.
+    """
+    client = scope.get("client")
+    host = client[0] if client else "unknown"
+    if not RATE_LIMIT_TRUSTED_PROXIES or not is_trusted_proxy(host):
+        return host
+    forwarded = [
+        address.strip()
+        for name, value in scope["headers"]
+        if name == FORWARDED_FOR_HEADER
+        for address in value.decode("latin-1").split(",")
+    ]
+    for address in reversed(forwarded):
+        host = address
+        if not is_trusted_proxy(address):
+            break
+    return host
+
+
+def client_limits(scope: Scope) -> tuple[str, float, float]:
+    """Identify the client of a request and get its rate and burst."""
+    for name, value in scope["headers"]:
+        if name == API_KEY_HEADER:
+            key = value.decode("latin-1")
+            if key in RATE_LIMIT_API_KEYS:
+                return f"key:{key}", RATE_LIMIT_KEY_RATE, RATE_LIMIT_KEY_BURST
+            break
+    return f"ip:{client_address(scope)}", RATE_LIMIT_RATE, RATE_LIMIT_BURST
+
+
+class LocalBuckets:
+    """Token buckets of one worker, as (tokens, updated) per client."""
+
+    def __init__(self, max_clients: int) -> None:
+        self.max_clients = max_clients
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    async def take(
+        self,
+        client: str,
+        cost: float,
+        rate: float,
+        burst: float,
+    ) -> tuple[bool, float]:
+        """Take ``cost`` tokens if there are enough; get if so and the rest."""
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(client, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        self._buckets[client] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            # A bucket left alone long enough is full, as if never used
+            self._buckets.popitem(last=False)
+        return allowed, tokens
+
+
+class SharedBuckets:
+    """Token buckets in a SQLite file shared by the workers of a host.
+
+    Each take is a single upsert, so concurrent workers never lose tokens.
+    Every ``RATE_LIMIT_PRUNE_INTERVAL`` seconds a take also deletes the
+    buckets left alone long enough to be full again.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._connection: sqlite3.Connection | None = None
+        self._pruned = 0.0
+
+    def __len__(self) -> int:
+        with self._lock:
+            (count,) = (
+                self._connect()
+                .execute("SELECT count(*) FROM rate_limit_bucket")
+                .fetchone()
+            )
+        return count
+
+    async def take(
+        self,
+        client: str,
+        cost: float,
+        rate: float,
+        burst: float,
+    ) -> tuple[bool, float]:
+        """Take ``cost`` tokens if there are enough; get if so and the rest."""
+        return await asyncio.to_thread(self._take, client, cost, rate, burst)
+
+    def _take(
+        self,
+        client: str,
+        cost: float,
+        rate: float,
+        burst: float,
+    ) -> tuple[bool, float]:
+        """Refill, take and store a bucket in one statement."""
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            if now - self._pruned >= RATE_LIMIT_PRUNE_INTERVAL:
+                connection.execute(PRUNE_BUCKETS, {"before": now - FULL_AFTER})
+                self._pruned = now
+            allowed, tokens = connection.execute(
+                TAKE_TOKENS,
+                {
+                    "client": client,
+                    "cost": cost,
+                    "rate": rate,
+                    "burst": burst,
+                    "now": now,
+                },
+            ).fetchone()
+        return bool(allowed), tokens
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the file on first use, creating the table if missing."""
+        if self._connection is None:
+            connection = sqlite3.connect(
+                self.path,
+                timeout=5,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            connection.execute("PRAGMA journal_mode=WAL")
+            # Losing the latest takes in a crash only refills some buckets
+            connection.execute("PRAGMA synchronous=OFF")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS rate_limit_bucket ("
+                "client TEXT PRIMARY KEY, tokens REAL NOT NULL, "
+                "updated REAL NOT NULL, allowed INTEGER NOT NULL)",
+            )
+            self._connection = connection
+        return self._connection
+
+
+@dataclass
+class RateLimitStats:
+    """Counters of the rate limiter."""
+
+    allowed: int = 0
+    limited: int = 0
+
+
+class RateLimiter:
+    """ASGI middleware taking the cost of every API request from its client."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        cost = (
+            route_cost(scope["method"], scope["path"])
+            if scope["type"] == "http" and RATE_LIMIT_ENABLED
+            else None
+        )
+        if cost is None:
+            await self.app(scope, receive, send)
+            return
+
+        client, rate, burst = client_limits(scope)
+        # A cost above the burst could never be paid
+        cost = min(cost, burst)
+        allowed, tokens = await rate_limit_buckets.take(
+            client,
+            cost,
+            rate,
+            burst,
+        )
+        headers = [
+            ("X-RateLimit-Limit", str(math.floor(burst))),
+            ("X-RateLimit-Remaining", str(math.floor(tokens))),
+            ("X-RateLimit-Reset", str(math.ceil((burst - tokens) / rate))),
+        ]
+        if not allowed:
+            stats.limited += 1
+            await self._reject(send, headers, (cost - tokens) / rate)
+            return
+
+        stats.allowed += 1
+
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                response_headers = MutableHeaders(scope=message)
+                for name, value in headers:
+                    response_headers.append(name, value)
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+    async def _reject(
+        self,
+        send: Send,
+        headers: list[tuple[str, str]],
+        retry_after: float,
+    ) -> None:
+        """Answer with 429, Retry-After and the rate limit headers."""
+        body = json.dumps({"detail": "Too many requests"}).encode()
+        await send(
+            {
+                "type": "http.response.start",
+                "status": 429,
+                "headers": [
+                    (b"content-type", b"application/json"),
+                    (b"content-length", str(len(body)).encode()),
+                    (b"retry-after", str(math.ceil(retry_after)).encode()),
+                    *(
+                        (name.lower().encode(), value.encode())
+                        for name, value in headers
+                    ),
+                ],
+            },
+        )
+        await send({"type": "http.response.body", "body": body})
+
+
+rate_limit_buckets: LocalBuckets | SharedBuckets = (
+    SharedBuckets(RATE_LIMIT_DATABASE)
+    if RATE_LIMIT_DATABASE
+    else LocalBuckets(RATE_LIMIT_MAX_CLIENTS)
+)
+stats = RateLimitStats()
+
+
+def rate_limit_stats() -> dict[str, int]:
+    """Get the counters of the rate limiter and the clients tracked."""
+    return {**asdict(stats), "clients": len(rate_limit_buckets)}
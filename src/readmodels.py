@@ -0,0 +1,109 @@
+"""Denormalized read tables maintained from the normalized tables.
+
+``result_wide`` and ``qualifying_wide`` hold each result and qualifying row
+together with the names of its driver, constructor, race and circuit, so
+their list routes read one table through its indexes instead of joining.
+The write handlers refresh the affected rows in the same transaction as
+their write, and the loader rebuilds the tables after a load.
+"""
+
+from sqlalchemy import Delete, Select, delete, insert, select
+from sqlmodel import Session, SQLModel
+
+from src.models import (
+    Circuit,
+    Constructor,
+    Driver,
+    Qualifying,
+    QualifyingWide,
+    Race,
+    Result,
+    ResultWide,
+)
+
+
+def joined_names(statement: Select, source: type[SQLModel]) -> Select:
+    """Add the driver, constructor, race and circuit names to a select."""
+    return (
+        statement.add_columns(
+            Driver.code.label("driver_code"),
+            Driver.forename.label("driver_forename"),
+            Driver.surname.label("driver_surname"),
+            Constructor.name.label("constructor_name"),
+            Race.year.label("race_year"),
+            Race.round.label("race_round"),
+            Race.name.label("race_name"),
+            Race.circuit_id.label("circuit_id"),
+            Circuit.name.label("circuit_name"),
+        )
+        # Outer joins keep a row for every source row, as rows referring to
+        # missing drivers or races are not rejected on SQLite
+        .outerjoin(Driver, Driver.driver_id == source.driver_id)
+        .outerjoin(
+            Constructor,
+            Constructor.constructor_id == source.constructor_id,
+        )
+        .outerjoin(Race, Race.race_id == source.race_id)
+        .outerjoin(Circuit, Circuit.circuit_id == Race.circuit_id)
+    )
+
+
+class WideTable:
+    """Denormalized table filled from a select over the normalized ones."""
+
+    def __init__(self, model: type[SQLModel], source: Select) -> None:
+        self.model = model
+        self.columns = [column.name for column in model.__table__.columns]
+        self._source = source.subquery()
+
+    def refresh(self, session: Session, column: str, value: int) -> None:
+        """Rewrite the rows whose ``column`` equals ``value``.
+
+        Call after flushing the write, in the same transaction.
+        """
+        table = self.model.__table__
+        self._copy(
+            session,
+            delete(table).where(table.c[column] == value),
+            self._select().where(self._source.c[column] == value),
+        )
+
+    def rebuild(self, session: Session) -> None:
+        """Rewrite every row."""
+        self._copy(session, delete(self.model.__table__), self._select())
+
+    def _select(self) -> Select:
+        """Select the source rows in the column order of the table."""
+        return select(*(self._source.c[name] for name in self.columns))
+
+    def _copy(self, session: Session, remove: Delete, source: Select) -> None:
+        """Delete stale rows and insert fresh copies from the source."""
+        connection = session.connection()
+        connection.execute(remove)
+        connection.execute(
+            insert(self.model.__table__).from_select(self.columns, source),
+        )
+
+
+result_wide = WideTable(
+    ResultWide,
+    joined_names(select(*Result.__table__.columns), Result),
+)
+qualifying_wide = WideTable(
+    QualifyingWide,
+    joined_names(select(*Qualifying.__table__.columns), Qualifying),
+)
+
+wide_tables = [result_wide, qualifying_wide]
+
+
+def refresh_wide_tables(session: Session, column: str, value: int) -> None:
+    """Rewrite the rows of every wide table whose ``column`` is ``value``."""
+    for wide_table in wide_tables:
+        wide_table.refresh(session, column, value)
+
+
+def rebuild_wide_tables(session: Session) -> None:
+    """Rewrite every wide table."""
+    for wide_table in wide_tables:
+        wide_table.rebuild(session)
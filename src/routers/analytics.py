@@ -0,0 +1,91 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlmodel import Session
+
+from src.cache import memoized, race_rows
+from src.database import get_read_session
+from src.models import (
+    Driver,
+    LapTime,
+    PitStop,
+    PointsSystem,
+    Race,
+    RacePaceRead,
+    ResultWide,
+    SeasonStandingsRead,
+    SprintResult,
+)
+
+router = APIRouter()
+
+
+@router.post("/analytics/points-what-if")
+def get_points_what_if(
+    system: PointsSystem,
+    session: Annotated[Session, Depends(get_read_session)],
+) -> list[SeasonStandingsRead]:
+    """Recompute every season's championships under another points system.
+
+    ``points`` scores classified finishers by place; the fastest lap and
+    sprint results can score too. Returns the top ``top`` drivers and
+    constructors of every season, constructors from 1958 on.
+    """
+    # Imported on first use to keep Polars out of worker startup
+    from src.analytics import (  # noqa: PLC0415
+        points_what_if,
+        results_frame,
+        sprint_results_available,
+        sprint_results_frame,
+    )
+
+    if system.sprint_points and not sprint_results_available(session):
+        raise HTTPException(
+            status_code=400,
+            detail="Sprint results are not available",
+        )
+
+    return memoized(
+        ("points-what-if", system.model_dump_json()),
+        (ResultWide.__tablename__, SprintResult.__tablename__),
+        lambda: points_what_if(
+            results_frame(session),
+            sprint_results_frame(session) if system.sprint_points else None,
+            system,
+        ),
+    )
+
+
+@router.get("/analytics/races/{race_id}/pace")
+def get_race_pace(
+    race_id: int,
+    session: Annotated[Session, Depends(get_read_session)],
+) -> RacePaceRead:
+    """Get the lap time distribution of every driver in a race.
+
+    Gives each driver's median, 10th and 90th percentile lap time, every
+    lap's gap and delta to the leader, and the degradation of each stint
+    between pit stops, from the race's timed laps.
+    """
+    from src.analytics import (  # noqa: PLC0415
+        load_laps,
+        load_pit_laps,
+        race_pace,
+    )
+
+    if session.get(Race, race_id) is None:
+        raise HTTPException(status_code=404, detail="Race not found")
+
+    return memoized(
+        ("race-pace", race_id),
+        (
+            race_rows(LapTime.__tablename__, race_id),
+            PitStop.__tablename__,
+            Driver.__tablename__,
+        ),
+        lambda: race_pace(
+            load_laps(session, race_id),
+            load_pit_laps(session, race_id),
+            race_id,
+        ),
+    )
@@ -1,105 +1,140 @@
+import math
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam
 from sqlmodel import Session, func, select
 
-from src.database import get_session
-from src.models import Circuit, CircuitCreate, CircuitRead, CircuitUpdate
+from src.crud import NamedCrud
+from src.database import get_read_session
+from src.filters import QueryFilters, filter_openapi, filter_params
+from src.models import (
+    Circuit,
+    CircuitCreate,
+    CircuitDistanceRead,
+    CircuitRead,
+    CircuitUpdate,
+)
+from src.snapshots import circuit_writable, ensure_circuit_writable
+from src.spatial import (
+    chord_length,
+    circuit_index,
+    haversine_km,
+    to_unit_vector,
+)
+from src.streaming import stream_rows
 
 router = APIRouter()
 
 
-@router.get("/circuits", response_model=list[CircuitRead])
+# Built once; requests only bind their values
+circuits_by_country = select(Circuit).where(
+    func.lower(Circuit.country) == func.lower(bindparam("country")),
+)
+circuits_by_name = select(Circuit).where(
+    func.lower(Circuit.name).like(bindparam("pattern")),
+)
+
+
+@router.get(
+    "/circuits",
+    response_model=list[CircuitRead],
+    openapi_extra=filter_openapi(Circuit),
+)
 def get_circuits(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[Session, Depends(get_read_session)],
+    filters: Annotated[QueryFilters, Depends(filter_params(Circuit))],
     skip: int = 0,
     limit: int = 100,
 ) -> list[Circuit]:
-    """Get all circuits with pagination."""
-    statement = select(Circuit).offset(skip).limit(limit)
+    """Get all circuits with pagination, filters and ordering.
+
+    See src/filters.py for the filter syntax, e.g. ``?country=Italy``.
+    """
+    statement = filters.apply(select(Circuit)).offset(skip).limit(limit)
     return list(session.exec(statement).all())
 
 
-@router.get("/circuits/{circuit_id}", response_model=CircuitRead)
-def get_circuit(
-    circuit_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> Circuit:
-    """Get a specific circuit by ID."""
-    circuit = session.get(Circuit, circuit_id)
-    if not circuit:
-        raise HTTPException(status_code=404, detail="Circuit not found")
-    return circuit
-
-
-@router.post("/circuits", response_model=CircuitRead)
-def create_circuit(
-    circuit: CircuitCreate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Circuit:
-    """Create a new circuit."""
-    db_circuit = Circuit.model_validate(circuit)
-    session.add(db_circuit)
-    session.commit()
-    session.refresh(db_circuit)
-    return db_circuit
-
-
-@router.put("/circuits/{circuit_id}", response_model=CircuitRead)
-def update_circuit(
-    circuit_id: int,
-    circuit: CircuitUpdate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Circuit:
-    """Update a circuit."""
-    db_circuit = session.get(Circuit, circuit_id)
-    if not db_circuit:
-        raise HTTPException(status_code=404, detail="Circuit not found")
-
-    circuit_data = circuit.model_dump(exclude_unset=True)
-    for key, value in circuit_data.items():
-        setattr(db_circuit, key, value)
-
-    session.add(db_circuit)
-    session.commit()
-    session.refresh(db_circuit)
-    return db_circuit
-
-
-@router.delete("/circuits/{circuit_id}")
-def delete_circuit(
-    circuit_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> dict[str, str]:
-    """Delete a circuit."""
-    circuit = session.get(Circuit, circuit_id)
-    if not circuit:
-        raise HTTPException(status_code=404, detail="Circuit not found")
-
-    session.delete(circuit)
-    session.commit()
-    return {"message": "Circuit deleted successfully"}
+@router.get("/circuits/near")
+def get_circuits_near(
+    session: Annotated[Session, Depends(get_read_session)],
+    lat: Annotated[float, Query(ge=-90, le=90)],
+    lng: Annotated[float, Query(ge=-180, le=180)],
+    radius_km: Annotated[float | None, Query(gt=0)] = None,
+    k: Annotated[int | None, Query(ge=1, le=100)] = None,
+) -> list[CircuitDistanceRead]:
+    """Get the circuits nearest to a point, nearest first.
+
+    Returns the ``k`` nearest circuits, the circuits within ``radius_km``
+    kilometres, or the ``k`` nearest within the radius when both are set.
+    """
+    if radius_km is None and k is None:
+        raise HTTPException(
+            status_code=400,
+            detail="Set radius_km, k or both",
+        )
+
+    max_distance = math.inf if radius_km is None else chord_length(radius_km)
+    nearest = circuit_index.get(session).nearest(
+        to_unit_vector(lat, lng),
+        k,
+        max_distance,
+    )
+    return [
+        CircuitDistanceRead(
+            **circuit.model_dump(),
+            distance_km=haversine_km(lat, lng, circuit.lat, circuit.lng),
+        )
+        for _, circuit in nearest
+    ]
 
 
 @router.get("/circuits/search/{country}", response_model=list[CircuitRead])
 def get_circuits_by_country(
     country: str,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Circuit]:
+    request: Request,
+) -> StreamingResponse:
     """Get circuits by country (case-insensitive)."""
-    statement = select(Circuit).where(
-        func.lower(Circuit.country) == func.lower(country),
+    return stream_rows(
+        request,
+        circuits_by_country,
+        {"country": country},
+        CircuitRead,
     )
-    return list(session.exec(statement).all())
 
 
 @router.get("/circuits/search/name/{name}", response_model=list[CircuitRead])
 def search_circuits_by_name(
     name: str,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Circuit]:
+    request: Request,
+) -> StreamingResponse:
     """Search circuits by name (case-insensitive partial match)."""
-    statement = select(Circuit).where(
-        func.lower(Circuit.name).like(f"%{name.lower()}%"),
+    return stream_rows(
+        request,
+        circuits_by_name,
+        {"pattern": f"%{name.lower()}%"},
+        CircuitRead,
     )
-    return list(session.exec(statement).all())
+
+
+class CircuitCrud(NamedCrud[Circuit]):
+    """Circuits, which are part of the frozen weekend snapshots."""
+
+    def denied(self, session: Session, row: Circuit) -> None:
+        """Reject circuits of a frozen season's races."""
+        ensure_circuit_writable(session, row.circuit_id)
+
+
+crud = CircuitCrud(
+    Circuit,
+    "circuit",
+    guard=circuit_writable(Circuit.circuit_id),
+)
+crud.add_routes(
+    router,
+    "/circuits",
+    create_model=CircuitCreate,
+    update_model=CircuitUpdate,
+    read_model=CircuitRead,
+)
@@ -1,89 +1,47 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam
 from sqlmodel import Session, func, select
 
-from src.database import get_session
+from src.crud import NamedCrud
+from src.database import get_read_session
+from src.filters import QueryFilters, filter_openapi, filter_params
 from src.models import (
     Constructor,
     ConstructorCreate,
     ConstructorRead,
     ConstructorUpdate,
 )
+from src.streaming import stream_rows
 
 router = APIRouter()
 
 
-@router.get("/constructors", response_model=list[ConstructorRead])
+# Built once; requests only bind their values
+constructors_by_nationality = select(Constructor).where(
+    func.lower(Constructor.nationality).like(bindparam("pattern")),
+)
+
+
+@router.get(
+    "/constructors",
+    response_model=list[ConstructorRead],
+    openapi_extra=filter_openapi(Constructor),
+)
 def get_constructors(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[Session, Depends(get_read_session)],
+    filters: Annotated[QueryFilters, Depends(filter_params(Constructor))],
     skip: int = 0,
     limit: int = 100,
 ) -> list[Constructor]:
-    """Get all constructors with pagination."""
-    statement = select(Constructor).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
-
-
-@router.get("/constructors/{constructor_id}", response_model=ConstructorRead)
-def get_constructor(
-    constructor_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> Constructor:
-    """Get a specific constructor by ID."""
-    constructor = session.get(Constructor, constructor_id)
-    if not constructor:
-        raise HTTPException(status_code=404, detail="Constructor not found")
-    return constructor
-
-
-@router.post("/constructors", response_model=ConstructorRead)
-def create_constructor(
-    constructor: ConstructorCreate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Constructor:
-    """Create a new constructor."""
-    db_constructor = Constructor.model_validate(constructor)
-    session.add(db_constructor)
-    session.commit()
-    session.refresh(db_constructor)
-    return db_constructor
-
+    """Get all constructors with pagination, filters and ordering.
 
-@router.put("/constructors/{constructor_id}", response_model=ConstructorRead)
-def update_constructor(
-    constructor_id: int,
-    constructor: ConstructorUpdate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Constructor:
-    """Update a constructor."""
-    db_constructor = session.get(Constructor, constructor_id)
-    if not db_constructor:
-        raise HTTPException(status_code=404, detail="Constructor not found")
-
-    constructor_data = constructor.model_dump(exclude_unset=True)
-    for key, value in constructor_data.items():
-        setattr(db_constructor, key, value)
-
-    session.add(db_constructor)
-    session.commit()
-    session.refresh(db_constructor)
-    return db_constructor
-
-
-@router.delete("/constructors/{constructor_id}")
-def delete_constructor(
-    constructor_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> dict[str, str]:
-    """Delete a constructor."""
-    constructor = session.get(Constructor, constructor_id)
-    if not constructor:
-        raise HTTPException(status_code=404, detail="Constructor not found")
-
-    session.delete(constructor)
-    session.commit()
-    return {"message": "Constructor deleted successfully"}
+    See src/filters.py for the filter syntax, e.g. ``?nationality=British``.
+    """
+    statement = filters.apply(select(Constructor)).offset(skip).limit(limit)
+    return list(session.exec(statement).all())
 
 
 @router.get(
@@ -92,10 +50,22 @@ def delete_constructor(
 )
 def get_constructors_by_nationality(
     nationality: str,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Constructor]:
+    request: Request,
+) -> StreamingResponse:
     """Get constructors by nationality."""
-    statement = select(Constructor).where(
-        func.lower(Constructor.nationality).like(f"%{nationality.lower()}%"),
+    return stream_rows(
+        request,
+        constructors_by_nationality,
+        {"pattern": f"%{nationality.lower()}%"},
+        ConstructorRead,
     )
-    return list(session.exec(statement).all())
+
+
+crud = NamedCrud(Constructor, "constructor")
+crud.add_routes(
+    router,
+    "/constructors",
+    create_model=ConstructorCreate,
+    update_model=ConstructorUpdate,
+    read_model=ConstructorRead,
+)
@@ -1,106 +1,229 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import ColumnElement, Select, bindparam, case
+from sqlalchemy.orm import aliased
 from sqlmodel import Session, func, select
 
-from src.database import get_session
-from src.models import Driver, DriverCreate, DriverRead, DriverUpdate
+from src.cache import memoized
+from src.crud import NamedCrud
+from src.database import get_read_session
+from src.filters import QueryFilters, filter_openapi, filter_params
+from src.models import (
+    Driver,
+    DriverComparisonRead,
+    DriverCreate,
+    DriverRead,
+    DriverUpdate,
+    Qualifying,
+    Race,
+    Result,
+    SeasonComparisonRead,
+)
+from src.streaming import stream_rows
 
 router = APIRouter()
 
 
-@router.get("/drivers", response_model=list[DriverRead])
+# Built once; requests only bind their values
+drivers_by_nationality = select(Driver).where(
+    func.lower(Driver.nationality) == func.lower(bindparam("nationality")),
+)
+drivers_by_name = select(Driver).where(
+    func.lower(Driver.surname).like(bindparam("pattern"))
+    | func.lower(Driver.forename).like(bindparam("pattern")),
+)
+
+
+def count_if(condition: ColumnElement[bool]) -> ColumnElement[int]:
+    """Count the rows of a group meeting a condition."""
+    return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+
+
+def head_to_head(model: type[Result] | type[Qualifying]) -> Select:
+    """Pair each race of a driver with the other driver's, per season.
+
+    Both sides are looked up by the (driver_id, race_id) index.
+    """
+    mine = aliased(model)
+    theirs = aliased(model)
+    place = "position_order" if model is Result else "position"
+    mine_place = getattr(mine, place)
+    theirs_place = getattr(theirs, place)
+    columns = [
+        Race.year,
+        func.count(),
+        count_if(mine_place < theirs_place),
+        count_if(mine_place > theirs_place),
+    ]
+    if model is Result:
+        columns += [
+            func.sum(mine.points),
+            func.sum(theirs.points),
+            func.sum(mine.position_order - theirs.position_order),
+        ]
+    return (
+        select(*columns)
+        .select_from(mine)
+        .join(
+            theirs,
+            (theirs.driver_id == bindparam("other_driver_id"))
+            & (theirs.race_id == mine.race_id),
+        )
+        .join(Race, Race.race_id == mine.race_id)
+        .where(mine.driver_id == bindparam("driver_id"))
+        .group_by(Race.year)
+    )
+
+
+race_head_to_head = head_to_head(Result)
+qualifying_head_to_head = head_to_head(Qualifying)
+
+
+def compare_drivers(
+    session: Session,
+    driver_id: int,
+    other_driver_id: int,
+) -> DriverComparisonRead:
+    """Compare two drivers over the races and qualifying they shared."""
+    for key in (driver_id, other_driver_id):
+        if crud.get(session, key) is None:
+            raise HTTPException(status_code=404, detail="Driver not found")
+
+    params = {"driver_id": driver_id, "other_driver_id": other_driver_id}
+    empty = dict.fromkeys(SeasonComparisonRead.model_fields, 0)
+    seasons: dict[int, dict[str, float]] = {}
+    gap = 0
+    for year, races, wins, losses, points, other_points, gaps in session.exec(
+        race_head_to_head,
+        params=params,
+    ):
+        seasons[year] = empty | {
+            "year": year,
+            "races": races,
+            "race_wins": wins,
+            "race_losses": losses,
+            "points": points,
+            "other_points": other_points,
+        }
+        gap += gaps
+    for year, sessions, wins, losses in session.exec(
+        qualifying_head_to_head,
+        params=params,
+    ):
+        seasons.setdefault(year, empty | {"year": year}).update(
+            qualifying_sessions=sessions,
+            qualifying_wins=wins,
+            qualifying_losses=losses,
+        )
+
+    season_reads = [
+        SeasonComparisonRead(**seasons[year]) for year in sorted(seasons)
+    ]
+    totals = {
+        field: sum(getattr(season, field) for season in season_reads)
+        for field in (
+            "races",
+            "race_wins",
+            "race_losses",
+            "qualifying_sessions",
+            "qualifying_wins",
+            "qualifying_losses",
+        )
+    }
+    return DriverComparisonRead(
+        driver_id=driver_id,
+        other_driver_id=other_driver_id,
+        **totals,
+        average_position_gap=gap / totals["races"]
+        if totals["races"]
+        else None,
+        seasons=season_reads,
+    )
+
+
+@router.get(
+    "/drivers",
+    response_model=list[DriverRead],
+    openapi_extra=filter_openapi(Driver),
+)
 def get_drivers(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[Session, Depends(get_read_session)],
+    filters: Annotated[QueryFilters, Depends(filter_params(Driver))],
     skip: int = 0,
     limit: int = 100,
 ) -> list[Driver]:
-    """Get all drivers with pagination."""
-    statement = select(Driver).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
-
-
-@router.get("/drivers/{driver_id}", response_model=DriverRead)
-def get_driver(
-    driver_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> Driver:
-    """Get a specific driver by ID."""
-    driver = session.get(Driver, driver_id)
-    if not driver:
-        raise HTTPException(status_code=404, detail="Driver not found")
-    return driver
-
-
-@router.post("/drivers", response_model=DriverRead)
-def create_driver(
-    driver: DriverCreate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Driver:
-    """Create a new driver."""
-    db_driver = Driver.model_validate(driver)
-    session.add(db_driver)
-    session.commit()
-    session.refresh(db_driver)
-    return db_driver
-
-
-@router.put("/drivers/{driver_id}", response_model=DriverRead)
-def update_driver(
-    driver_id: int,
-    driver: DriverUpdate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Driver:
-    """Update a driver."""
-    db_driver = session.get(Driver, driver_id)
-    if not db_driver:
-        raise HTTPException(status_code=404, detail="Driver not found")
-
-    driver_data = driver.model_dump(exclude_unset=True)
-    for key, value in driver_data.items():
-        setattr(db_driver, key, value)
-
-    session.add(db_driver)
-    session.commit()
-    session.refresh(db_driver)
-    return db_driver
-
-
-@router.delete("/drivers/{driver_id}")
-def delete_driver(
-    driver_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> dict[str, str]:
-    """Delete a driver."""
-    driver = session.get(Driver, driver_id)
-    if not driver:
-        raise HTTPException(status_code=404, detail="Driver not found")
+    """Get all drivers with pagination, filters and ordering.
 
-    session.delete(driver)
-    session.commit()
-    return {"message": "Driver deleted successfully"}
+    See src/filters.py for the filter syntax, e.g. ``?nationality=German``.
+    """
+    statement = filters.apply(select(Driver)).offset(skip).limit(limit)
+    return list(session.exec(statement).all())
 
 
 @router.get("/drivers/search/{nationality}", response_model=list[DriverRead])
 def get_drivers_by_nationality(
     nationality: str,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Driver]:
+    request: Request,
+) -> StreamingResponse:
     """Get drivers by nationality (case-insensitive)."""
-    statement = select(Driver).where(
-        func.lower(Driver.nationality) == func.lower(nationality),
+    return stream_rows(
+        request,
+        drivers_by_nationality,
+        {"nationality": nationality},
+        DriverRead,
     )
-    return list(session.exec(statement).all())
 
 
 @router.get("/drivers/search/name/{name}", response_model=list[DriverRead])
 def search_drivers_by_name(
     name: str,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Driver]:
+    request: Request,
+) -> StreamingResponse:
     """Search drivers by name (case-insensitive partial match)."""
-    statement = select(Driver).where(
-        (func.lower(Driver.surname).like(f"%{name.lower()}%"))
-        | (func.lower(Driver.forename).like(f"%{name.lower()}%")),
+    return stream_rows(
+        request,
+        drivers_by_name,
+        {"pattern": f"%{name.lower()}%"},
+        DriverRead,
     )
-    return list(session.exec(statement).all())
+
+
+@router.get("/drivers/{driver_id}/vs/{other_driver_id}")
+def get_driver_comparison(
+    driver_id: int,
+    other_driver_id: int,
+    session: Annotated[Session, Depends(get_read_session)],
+) -> DriverComparisonRead:
+    """Compare two drivers head to head in the races they both entered.
+
+    Counts the races and qualifying sessions each finished ahead in, the
+    average gap in finishing place and the points of every shared season.
+    """
+    if driver_id == other_driver_id:
+        raise HTTPException(
+            status_code=400,
+            detail="Compare two different drivers",
+        )
+
+    return memoized(
+        ("driver-comparison", driver_id, other_driver_id),
+        (
+            Driver.__tablename__,
+            Race.__tablename__,
+            Result.__tablename__,
+            Qualifying.__tablename__,
+        ),
+        lambda: compare_drivers(session, driver_id, other_driver_id),
+    )
+
+
+crud = NamedCrud(Driver, "driver")
+crud.add_routes(
+    router,
+    "/drivers",
+    create_model=DriverCreate,
+    update_model=DriverUpdate,
+    read_model=DriverRead,
+)
@@ -0,0 +1,87 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam
+from sqlmodel import select
+
+from src.admission import ADMISSION_RETRY_AFTER
+from src.ingest import INGEST_QUEUE_SIZE, unknown_references, writer
+from src.laptimes import lap_time_ms
+from src.models import LapTime, LapTimeCreate, LapTimeRead
+from src.streaming import stream_rows
+
+router = APIRouter()
+
+
+# Built once; requests only bind their values
+lap_times_by_race = (
+    select(LapTime)
+    .where(LapTime.race_id == bindparam("race_id"))
+    .order_by(LapTime.lap, LapTime.position)
+)
+lap_times_by_race_driver = lap_times_by_race.where(
+    LapTime.driver_id == bindparam("driver_id"),
+)
+
+
+@router.post("/ingest/laps", status_code=202)
+async def ingest_laps(
+    lap_times: list[LapTimeCreate],
+) -> dict[str, int]:
+    """Queue live lap times for the group-commit writer.
+
+    Records are written within ``INGEST_FLUSH_INTERVAL`` seconds; a later
+    record for the same race, driver and lap replaces the earlier one.
+    Requests with records of unknown races or drivers are rejected whole.
+    """
+    if len(lap_times) > INGEST_QUEUE_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {INGEST_QUEUE_SIZE} lap times per request",
+        )
+
+    records = []
+    for lap_time in lap_times:
+        record = lap_time.model_dump()
+        if record["milliseconds"] is None:
+            record["milliseconds"] = lap_time_ms(lap_time.time)
+        records.append(record)
+
+    unknown = await asyncio.to_thread(unknown_references, records)
+    if unknown:
+        listed = "; ".join(
+            f"{column}: {', '.join(map(str, ids))}"
+            for column, ids in unknown.items()
+        )
+        raise HTTPException(status_code=422, detail=f"Unknown {listed}")
+
+    if not writer.submit(records):
+        raise HTTPException(
+            status_code=503,
+            detail="Ingest queue is full, retry later",
+            headers={"Retry-After": str(ADMISSION_RETRY_AFTER)},
+        )
+    return {"accepted": len(records)}
+
+
+@router.get("/laps/race/{race_id}", response_model=list[LapTimeRead])
+def get_lap_times_by_race(
+    race_id: int,
+    request: Request,
+    driver_id: int | None = None,
+) -> StreamingResponse:
+    """Get lap times by race ID, optionally of one driver."""
+    if driver_id is None:
+        return stream_rows(
+            request,
+            lap_times_by_race,
+            {"race_id": race_id},
+            LapTimeRead,
+        )
+    return stream_rows(
+        request,
+        lap_times_by_race_driver,
+        {"race_id": race_id, "driver_id": driver_id},
+        LapTimeRead,
+    )
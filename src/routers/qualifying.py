@@ -1,105 +1,137 @@
-from typing import Annotated
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import bindparam
 from sqlmodel import Session, select
 
-from src.database import get_session
+from src.crud import RaceDataCrud
+from src.database import get_read_session
+from src.filters import QueryFilters, filter_openapi, filter_params
+from src.laptimes import qualifying_time_values
 from src.models import (
     Qualifying,
     QualifyingCreate,
     QualifyingRead,
     QualifyingUpdate,
+    QualifyingWide,
+    QualifyingWideRead,
 )
+from src.pagination import Page, PageParams, count_total, paginate
+from src.readmodels import qualifying_wide
+from src.snapshots import (
+    snapshot_response,
+)
+from src.streaming import stream_rows
 
 router = APIRouter()
 
 
-@router.get("/qualifying", response_model=list[QualifyingRead])
+# Built once; requests only bind their values
+qualifying_by_race = select(Qualifying).where(
+    Qualifying.race_id == bindparam("race_id"),
+)
+
+
+@router.get(
+    "/qualifying",
+    response_model=list[QualifyingRead] | Page[QualifyingRead],
+    openapi_extra=filter_openapi(Qualifying),
+)
 def get_qualifying(
-    session: Annotated[Session, Depends(get_session)],
-    skip: int = 0,
-    limit: int = 100,
-) -> list[Qualifying]:
-    """Get all qualifying results with pagination."""
-    statement = select(Qualifying).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
-
-
-@router.get("/qualifying/{qualify_id}", response_model=QualifyingRead)
-def get_qualifying_result(
-    qualify_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> Qualifying:
-    """Get a specific qualifying result by ID."""
-    qualifying = session.get(Qualifying, qualify_id)
-    if not qualifying:
-        raise HTTPException(
-            status_code=404,
-            detail="Qualifying result not found",
-        )
-    return qualifying
-
-
-@router.post("/qualifying", response_model=QualifyingRead)
-def create_qualifying(
-    qualifying: QualifyingCreate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Qualifying:
-    """Create a new qualifying result."""
-    db_qualifying = Qualifying.model_validate(qualifying)
-    session.add(db_qualifying)
-    session.commit()
-    session.refresh(db_qualifying)
-    return db_qualifying
-
-
-@router.put("/qualifying/{qualify_id}", response_model=QualifyingRead)
-def update_qualifying(
-    qualify_id: int,
-    qualifying: QualifyingUpdate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Qualifying:
-    """Update a qualifying result."""
-    db_qualifying = session.get(Qualifying, qualify_id)
-    if not db_qualifying:
-        raise HTTPException(
-            status_code=404,
-            detail="Qualifying result not found",
-        )
-
-    qualifying_data = qualifying.model_dump(exclude_unset=True)
-    for key, value in qualifying_data.items():
-        setattr(db_qualifying, key, value)
-
-    session.add(db_qualifying)
-    session.commit()
-    session.refresh(db_qualifying)
-    return db_qualifying
-
-
-@router.delete("/qualifying/{qualify_id}")
-def delete_qualifying(
-    qualify_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> dict[str, str]:
-    """Delete a qualifying result."""
-    qualifying = session.get(Qualifying, qualify_id)
-    if not qualifying:
-        raise HTTPException(
-            status_code=404,
-            detail="Qualifying result not found",
-        )
-
-    session.delete(qualifying)
-    session.commit()
-    return {"message": "Qualifying result deleted successfully"}
+    request: Request,
+    session: Annotated[Session, Depends(get_read_session)],
+    filters: Annotated[QueryFilters, Depends(filter_params(Qualifying))],
+    page: Annotated[PageParams, Depends()],
+) -> list[Qualifying] | Page[Qualifying]:
+    """Get all qualifying results with pagination, filters and ordering.
+
+    See src/filters.py for the filter syntax, e.g.
+    ``?race_id=18&position__lte=3``.
+    With ``total`` set the page is wrapped with the total count of matching
+    rows and the link to the next page.
+    """
+    statement = (
+        filters.apply(select(Qualifying)).offset(page.skip).limit(page.limit)
+    )
+    items = list(session.exec(statement).all())
+    if page.total is None:
+        return items
+    return paginate(
+        request,
+        items,
+        count_total(session, Qualifying, filters, page.total),
+        page,
+    )
+
+
+@router.get(
+    "/qualifying/wide",
+    response_model=list[QualifyingWideRead] | Page[QualifyingWideRead],
+    openapi_extra=filter_openapi(QualifyingWide),
+)
+def get_qualifying_wide(
+    request: Request,
+    session: Annotated[Session, Depends(get_read_session)],
+    filters: Annotated[QueryFilters, Depends(filter_params(QualifyingWide))],
+    page: Annotated[PageParams, Depends()],
+) -> list[QualifyingWide] | Page[QualifyingWide]:
+    """Get qualifying results with driver, constructor, race and circuit names.
+
+    Takes the same filters, ordering and ``total`` as ``/qualifying``, plus
+    filters on the joined fields such as ``?race_year=2021``.
+    """
+    statement = (
+        filters.apply(select(QualifyingWide))
+        .offset(page.skip)
+        .limit(page.limit)
+    )
+    items = list(session.exec(statement).all())
+    if page.total is None:
+        return items
+    return paginate(
+        request,
+        items,
+        count_total(session, QualifyingWide, filters, page.total),
+        page,
+    )
 
 
 @router.get("/qualifying/race/{race_id}", response_model=list[QualifyingRead])
 def get_qualifying_by_race(
     race_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Qualifying]:
+    request: Request,
+) -> Response:
     """Get qualifying results by race ID."""
-    statement = select(Qualifying).where(Qualifying.race_id == race_id)
-    return list(session.exec(statement).all())
+    snapshot = snapshot_response(f"qualifying/race/{race_id}", request)
+    if snapshot:
+        return snapshot
+
+    return stream_rows(
+        request,
+        qualifying_by_race,
+        {"race_id": race_id},
+        QualifyingRead,
+    )
+
+
+class QualifyingCrud(RaceDataCrud[Qualifying]):
+    """Qualifying results, with their lap times in milliseconds."""
+
+    def prepare(self, values: dict[str, Any]) -> dict[str, Any]:
+        """Add the millisecond columns of the lap times."""
+        return qualifying_time_values(values)
+
+
+crud = QualifyingCrud(
+    Qualifying,
+    "qualifying result",
+    read=QualifyingRead,
+    wide_table=qualifying_wide,
+)
+crud.add_routes(
+    router,
+    "/qualifying",
+    create_model=QualifyingCreate,
+    update_model=QualifyingUpdate,
+    read_model=QualifyingRead,
+)
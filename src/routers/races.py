@@ -1,91 +1,177 @@
-from typing import Annotated
+import os
+import time
+from datetime import UTC, datetime
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import bindparam
 from sqlmodel import Session, select
 
-from src.database import get_session
-from src.models import Race, RaceCreate, RaceRead, RaceUpdate
+from src.cache import table_versions, weekend_cache
+from src.crud import NamedCrud
+from src.database import get_read_session
+from src.filters import QueryFilters, filter_openapi, filter_params
+from src.models import (
+    Circuit,
+    Qualifying,
+    Race,
+    RaceCreate,
+    RaceRead,
+    RaceUpdate,
+    RaceWeekendRead,
+    Result,
+)
+from src.snapshots import (
+    ensure_season_writable,
+    season_writable,
+    snapshot_response,
+)
+from src.streaming import stream_rows
 
 router = APIRouter()
 
+# Seconds a rendered weekend is trusted, bounding staleness from writes made
+# through other workers
+WEEKEND_CACHE_TTL = float(os.getenv("WEEKEND_CACHE_TTL", "60"))
 
-@router.get("/races", response_model=list[RaceRead])
+# Tables a weekend is rendered from, whose writes invalidate it
+WEEKEND_TABLES = (
+    Race.__tablename__,
+    Circuit.__tablename__,
+    Qualifying.__tablename__,
+    Result.__tablename__,
+)
+
+
+def is_completed_season(year: int) -> bool:
+    """Check whether a season is over and its data will not change."""
+    return year < datetime.now(UTC).year
+
+
+def load_race_weekend(
+    session: Session,
+    race_id: int,
+) -> RaceWeekendRead | None:
+    """Load a race with its circuit, qualifying and results."""
+    row = session.exec(
+        select(Race, Circuit)
+        .join(Circuit, Race.circuit_id == Circuit.circuit_id)
+        .where(Race.race_id == race_id),
+    ).first()
+    if not row:
+        return None
+    race, circuit = row
+
+    return RaceWeekendRead.model_validate(
+        {
+            "race": race,
+            "circuit": circuit,
+            "qualifying": session.exec(
+                select(Qualifying)
+                .where(Qualifying.race_id == race_id)
+                .order_by(Qualifying.position),
+            ).all(),
+            "results": session.exec(
+                select(Result)
+                .where(Result.race_id == race_id)
+                .order_by(Result.position_order),
+            ).all(),
+        },
+    )
+
+
+# Built once; requests only bind their values
+races_by_year = select(Race).where(Race.year == bindparam("year"))
+
+
+@router.get(
+    "/races",
+    response_model=list[RaceRead],
+    openapi_extra=filter_openapi(Race),
+)
 def get_races(
-    session: Annotated[Session, Depends(get_session)],
+    session: Annotated[Session, Depends(get_read_session)],
+    filters: Annotated[QueryFilters, Depends(filter_params(Race))],
     skip: int = 0,
     limit: int = 100,
 ) -> list[Race]:
-    """Get all races with pagination."""
-    statement = select(Race).offset(skip).limit(limit)
+    """Get all races with pagination, filters and ordering.
+
+    See src/filters.py for the filter syntax, e.g. ``?year__gte=2010``.
+    """
+    statement = filters.apply(select(Race)).offset(skip).limit(limit)
     return list(session.exec(statement).all())
 
 
-@router.get("/races/{race_id}", response_model=RaceRead)
-def get_race(
+@router.get("/races/{race_id}/weekend", response_model=RaceWeekendRead)
+def get_race_weekend(
     race_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> Race:
-    """Get a specific race by ID."""
-    race = session.get(Race, race_id)
-    if not race:
+    request: Request,
+    session: Annotated[Session, Depends(get_read_session)],
+) -> Response:
+    """Get a race with its circuit, qualifying and classification.
+
+    Weekends of frozen seasons are served from their immutable snapshots;
+    those of other completed seasons are rendered once and cached until
+    their tables are written to.
+    """
+    snapshot = snapshot_response(f"races/{race_id}/weekend", request)
+    if snapshot:
+        return snapshot
+
+    version = table_versions.get(*WEEKEND_TABLES)
+    cached = weekend_cache.get(race_id)
+    if cached and cached[0] == version and cached[1] > time.monotonic():
+        return Response(content=cached[2], media_type="application/json")
+
+    weekend = load_race_weekend(session, race_id)
+    if not weekend:
         raise HTTPException(status_code=404, detail="Race not found")
-    return race
+    body = weekend.model_dump_json().encode()
 
+    if is_completed_season(weekend.race.year):
+        weekend_cache.set(
+            race_id,
+            (version, time.monotonic() + WEEKEND_CACHE_TTL, body),
+        )
+    return Response(content=body, media_type="application/json")
 
-@router.post("/races", response_model=RaceRead)
-def create_race(
-    race: RaceCreate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Race:
-    """Create a new race."""
-    db_race = Race.model_validate(race)
-    session.add(db_race)
-    session.commit()
-    session.refresh(db_race)
-    return db_race
 
+@router.get("/races/year/{year}", response_model=list[RaceRead])
+def get_races_by_year(
+    year: int,
+    request: Request,
+) -> Response:
+    """Get races by year."""
+    snapshot = snapshot_response(f"races/year/{year}", request)
+    if snapshot:
+        return snapshot
 
-@router.put("/races/{race_id}", response_model=RaceRead)
-def update_race(
-    race_id: int,
-    race: RaceUpdate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Race:
-    """Update a race."""
-    db_race = session.get(Race, race_id)
-    if not db_race:
-        raise HTTPException(status_code=404, detail="Race not found")
+    return stream_rows(request, races_by_year, {"year": year}, RaceRead)
 
-    race_data = race.model_dump(exclude_unset=True)
-    for key, value in race_data.items():
-        setattr(db_race, key, value)
 
-    session.add(db_race)
-    session.commit()
-    session.refresh(db_race)
-    return db_race
+class RaceCrud(NamedCrud[Race]):
+    """Races, which may not be written once their season is frozen."""
 
+    def check(self, session: Session, values: dict[str, Any]) -> None:
+        """Reject races moved into a frozen season."""
+        if values.get("year") is not None:
+            ensure_season_writable(session, values["year"])
 
-@router.delete("/races/{race_id}")
-def delete_race(
-    race_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> dict[str, str]:
-    """Delete a race."""
-    race = session.get(Race, race_id)
-    if not race:
-        raise HTTPException(status_code=404, detail="Race not found")
+    def denied(self, session: Session, row: Race) -> None:
+        """Reject races of a frozen season."""
+        ensure_season_writable(session, row.year)
 
-    session.delete(race)
-    session.commit()
-    return {"message": "Race deleted successfully"}
+    def snapshot_key(self, key: int) -> str | None:
+        """Get the snapshot key of a race of a frozen season."""
+        return f"races/{key}"
 
 
-@router.get("/races/year/{year}", response_model=list[RaceRead])
-def get_races_by_year(
-    year: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Race]:
-    """Get races by year."""
-    statement = select(Race).where(Race.year == year)
-    return list(session.exec(statement).all())
+crud = RaceCrud(Race, "race", guard=season_writable(Race.year))
+crud.add_routes(
+    router,
+    "/races",
+    create_model=RaceCreate,
+    update_model=RaceUpdate,
+    read_model=RaceRead,
+)
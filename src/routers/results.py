@@ -1,101 +1,151 @@
-from typing import Annotated
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam
 from sqlmodel import Session, select
 
-from src.database import get_session
-from src.models import Result, ResultCreate, ResultRead, ResultUpdate
+from src.crud import RaceDataCrud
+from src.database import get_read_session
+from src.filters import QueryFilters, filter_openapi, filter_params
+from src.laptimes import result_time_values
+from src.models import (
+    Result,
+    ResultCreate,
+    ResultRead,
+    ResultUpdate,
+    ResultWide,
+    ResultWideRead,
+)
+from src.pagination import Page, PageParams, count_total, paginate
+from src.readmodels import result_wide
+from src.snapshots import (
+    snapshot_response,
+)
+from src.streaming import stream_rows
 
 router = APIRouter()
 
 
-@router.get("/results", response_model=list[ResultRead])
+# Built once; requests only bind their values
+results_by_race = select(Result).where(Result.race_id == bindparam("race_id"))
+results_by_driver = select(Result).where(
+    Result.driver_id == bindparam("driver_id"),
+)
+
+
+@router.get(
+    "/results",
+    response_model=list[ResultRead] | Page[ResultRead],
+    openapi_extra=filter_openapi(Result),
+)
 def get_results(
-    session: Annotated[Session, Depends(get_session)],
-    skip: int = 0,
-    limit: int = 100,
-) -> list[Result]:
-    """Get all results with pagination."""
-    statement = select(Result).offset(skip).limit(limit)
-    return list(session.exec(statement).all())
-
-
-@router.get("/results/{result_id}", response_model=ResultRead)
-def get_result(
-    result_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> Result:
-    """Get a specific result by ID."""
-    result = session.get(Result, result_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Result not found")
-    return result
-
-
-@router.post("/results", response_model=ResultRead)
-def create_result(
-    result: ResultCreate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Result:
-    """Create a new result."""
-    db_result = Result.model_validate(result)
-    session.add(db_result)
-    session.commit()
-    session.refresh(db_result)
-    return db_result
-
-
-@router.put("/results/{result_id}", response_model=ResultRead)
-def update_result(
-    result_id: int,
-    result: ResultUpdate,
-    session: Annotated[Session, Depends(get_session)],
-) -> Result:
-    """Update a result."""
-    db_result = session.get(Result, result_id)
-    if not db_result:
-        raise HTTPException(status_code=404, detail="Result not found")
-
-    result_data = result.model_dump(exclude_unset=True)
-    for key, value in result_data.items():
-        setattr(db_result, key, value)
-
-    session.add(db_result)
-    session.commit()
-    session.refresh(db_result)
-    return db_result
-
-
-@router.delete("/results/{result_id}")
-def delete_result(
-    result_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> dict[str, str]:
-    """Delete a result."""
-    result = session.get(Result, result_id)
-    if not result:
-        raise HTTPException(status_code=404, detail="Result not found")
-
-    session.delete(result)
-    session.commit()
-    return {"message": "Result deleted successfully"}
+    request: Request,
+    session: Annotated[Session, Depends(get_read_session)],
+    filters: Annotated[QueryFilters, Depends(filter_params(Result))],
+    page: Annotated[PageParams, Depends()],
+) -> list[Result] | Page[Result]:
+    """Get all results with pagination, filters and ordering.
+
+    See src/filters.py for the filter syntax, e.g.
+    ``?race_id=18&position__lte=3``.
+    With ``total`` set the page is wrapped with the total count of matching
+    rows and the link to the next page.
+    """
+    statement = (
+        filters.apply(select(Result)).offset(page.skip).limit(page.limit)
+    )
+    items = list(session.exec(statement).all())
+    if page.total is None:
+        return items
+    return paginate(
+        request,
+        items,
+        count_total(session, Result, filters, page.total),
+        page,
+    )
+
+
+@router.get(
+    "/results/wide",
+    response_model=list[ResultWideRead] | Page[ResultWideRead],
+    openapi_extra=filter_openapi(ResultWide),
+)
+def get_results_wide(
+    request: Request,
+    session: Annotated[Session, Depends(get_read_session)],
+    filters: Annotated[QueryFilters, Depends(filter_params(ResultWide))],
+    page: Annotated[PageParams, Depends()],
+) -> list[ResultWide] | Page[ResultWide]:
+    """Get results with driver, constructor, race and circuit names.
+
+    Takes the same filters, ordering and ``total`` as ``/results``, plus
+    filters on the joined fields such as ``?race_year=2021``.
+    """
+    statement = (
+        filters.apply(select(ResultWide)).offset(page.skip).limit(page.limit)
+    )
+    items = list(session.exec(statement).all())
+    if page.total is None:
+        return items
+    return paginate(
+        request,
+        items,
+        count_total(session, ResultWide, filters, page.total),
+        page,
+    )
 
 
 @router.get("/results/race/{race_id}", response_model=list[ResultRead])
 def get_results_by_race(
     race_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Result]:
+    request: Request,
+) -> Response:
     """Get results by race ID."""
-    statement = select(Result).where(Result.race_id == race_id)
-    return list(session.exec(statement).all())
+    snapshot = snapshot_response(f"results/race/{race_id}", request)
+    if snapshot:
+        return snapshot
+
+    return stream_rows(
+        request,
+        results_by_race,
+        {"race_id": race_id},
+        ResultRead,
+    )
 
 
 @router.get("/results/driver/{driver_id}", response_model=list[ResultRead])
 def get_results_by_driver(
     driver_id: int,
-    session: Annotated[Session, Depends(get_session)],
-) -> list[Result]:
+    request: Request,
+) -> StreamingResponse:
     """Get results by driver ID."""
-    statement = select(Result).where(Result.driver_id == driver_id)
-    return list(session.exec(statement).all())
+    return stream_rows(
+        request,
+        results_by_driver,
+        {"driver_id": driver_id},
+        ResultRead,
+    )
+
+
+class ResultCrud(RaceDataCrud[Result]):
+    """Race results, with typed copies of their fastest lap strings."""
+
+    def prepare(self, values: dict[str, Any]) -> dict[str, Any]:
+        """Add the typed fastest lap columns."""
+        return result_time_values(values)
+
+
+crud = ResultCrud(
+    Result,
+    "result",
+    read=ResultRead,
+    wide_table=result_wide,
+)
+crud.add_routes(
+    router,
+    "/results",
+    create_model=ResultCreate,
+    update_model=ResultUpdate,
+    read_model=ResultRead,
+)
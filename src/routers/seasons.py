@@ -0,0 +1,183 @@
+from datetime import UTC, datetime
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import TypeAdapter
+from sqlmodel import Session, select
+
+from src.database import get_read_session, get_session
+from src.hotswap import ensure_writes_allowed
+from src.models import (
+    FrozenSeason,
+    Qualifying,
+    QualifyingRead,
+    Race,
+    RaceRead,
+    Result,
+    ResultRead,
+)
+from src.routers.races import is_completed_season, load_race_weekend
+from src.snapshots import remove_snapshot, write_snapshot
+
+router = APIRouter()
+
+races_adapter = TypeAdapter(list[RaceRead])
+results_adapter = TypeAdapter(list[ResultRead])
+qualifying_adapter = TypeAdapter(list[QualifyingRead])
+
+
+def season_snapshot_keys(year: int, race_ids: list[int]) -> list[str]:
+    """Get the snapshot keys of every GET response frozen for a season."""
+    keys = [f"races/year/{year}"]
+    for race_id in race_ids:
+        keys.extend(
+            [
+                f"races/{race_id}",
+                f"races/{race_id}/weekend",
+                f"results/race/{race_id}",
+                f"qualifying/race/{race_id}",
+            ],
+        )
+    return keys
+
+
+def write_season_snapshots(session: Session, races: list[Race]) -> None:
+    """Render every race, result and qualifying response of a season."""
+    write_snapshot(
+        f"races/year/{races[0].year}",
+        races_adapter.dump_json(
+            races_adapter.validate_python(races, from_attributes=True),
+        ),
+    )
+    for race in races:
+        results = session.exec(
+            select(Result).where(Result.race_id == race.race_id),
+        ).all()
+        qualifying = session.exec(
+            select(Qualifying).where(Qualifying.race_id == race.race_id),
+        ).all()
+        weekend = load_race_weekend(session, race.race_id)
+
+        write_snapshot(
+            f"races/{race.race_id}",
+            RaceRead.model_validate(race).model_dump_json().encode(),
+        )
+        write_snapshot(
+            f"races/{race.race_id}/weekend",
+            weekend.model_dump_json().encode(),
+        )
+        write_snapshot(
+            f"results/race/{race.race_id}",
+            results_adapter.dump_json(
+                results_adapter.validate_python(
+                    results,
+                    from_attributes=True,
+                ),
+            ),
+        )
+        write_snapshot(
+            f"qualifying/race/{race.race_id}",
+            qualifying_adapter.dump_json(
+                qualifying_adapter.validate_python(
+                    qualifying,
+                    from_attributes=True,
+                ),
+            ),
+        )
+
+
+def frozen_snapshot_keys(session: Session) -> list[str]:
+    """Get the snapshot keys of every frozen season."""
+    keys = []
+    for year in session.exec(select(FrozenSeason.year)).all():
+        race_ids = session.exec(select(Race.race_id).where(Race.year == year))
+        keys.extend(season_snapshot_keys(year, list(race_ids.all())))
+    return keys
+
+
+def render_frozen_seasons(session: Session, previous_keys: list[str]) -> None:
+    """Render the frozen seasons again after their data was reloaded.
+
+    Snapshots of ``previous_keys`` whose races are no longer in a frozen
+    season are removed.
+    """
+    for key in set(previous_keys) - set(frozen_snapshot_keys(session)):
+        remove_snapshot(key)
+    for year in session.exec(select(FrozenSeason.year)).all():
+        races = session.exec(select(Race).where(Race.year == year)).all()
+        if races:
+            write_season_snapshots(session, list(races))
+        else:
+            remove_snapshot(f"races/year/{year}")
+
+
+@router.get("/seasons/frozen")
+def get_frozen_seasons(
+    session: Annotated[Session, Depends(get_read_session)],
+) -> list[FrozenSeason]:
+    """Get all frozen seasons."""
+    statement = select(FrozenSeason).order_by(FrozenSeason.year)
+    return list(session.exec(statement).all())
+
+
+@router.post("/seasons/{year}/freeze")
+def freeze_season(
+    year: int,
+    session: Annotated[Session, Depends(get_session)],
+) -> FrozenSeason:
+    """Pre-render every race, result and qualifying response of a season.
+
+    The freeze is committed first, so writes to the season are rejected
+    before its data is read, and rolled back if rendering fails. Freezing
+    an already frozen season renders its snapshots again.
+    """
+    ensure_writes_allowed()
+    if not is_completed_season(year):
+        raise HTTPException(
+            status_code=409,
+            detail="Only completed seasons can be frozen",
+        )
+
+    races = session.exec(select(Race).where(Race.year == year)).all()
+    if not races:
+        raise HTTPException(status_code=404, detail="Season not found")
+
+    refreezing = session.get(FrozenSeason, year) is not None
+    frozen_season = session.merge(
+        FrozenSeason(year=year, frozen_at=datetime.now(UTC)),
+    )
+    session.commit()
+    try:
+        write_season_snapshots(session, list(races))
+    except Exception:
+        # A frozen season's data cannot have changed, so a failed refreeze
+        # leaves consistent snapshots behind
+        if not refreezing:
+            race_ids = [race.race_id for race in races]
+            for key in season_snapshot_keys(year, race_ids):
+                remove_snapshot(key)
+            session.delete(frozen_season)
+            session.commit()
+        raise
+    session.refresh(frozen_season)
+    return frozen_season
+
+
+@router.delete("/seasons/{year}/freeze")
+def unfreeze_season(
+    year: int,
+    session: Annotated[Session, Depends(get_session)],
+) -> dict[str, str]:
+    """Remove the snapshots of a season and accept writes to it again."""
+    ensure_writes_allowed()
+    frozen_season = session.get(FrozenSeason, year)
+    if not frozen_season:
+        raise HTTPException(status_code=404, detail="Season is not frozen")
+
+    race_ids = session.exec(select(Race.race_id).where(Race.year == year))
+    for key in season_snapshot_keys(year, list(race_ids.all())):
+        remove_snapshot(key)
+
+    session.delete(frozen_season)
+    session.commit()
+    return {"message": "Season unfrozen successfully"}
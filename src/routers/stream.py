@@ -0,0 +1,66 @@
+import asyncio
+import json
+from collections.abc import AsyncGenerator
+from typing import Annotated
+
+from fastapi import APIRouter, Header
+from fastapi.responses import StreamingResponse
+
+from src.events import ChangeEvent, broker
+
+router = APIRouter()
+
+HEARTBEAT_SECONDS = 15
+RECONNECT_MILLISECONDS = 1000
+
+
+def format_event(event: ChangeEvent) -> str:
+    """Format a change event as a Server-Sent Event."""
+    return (
+        f"id: {broker.event_id(event)}\n"
+        f"event: {event.table}.{event.operation}\n"
+        f"data: {json.dumps(event.data)}\n\n"
+    )
+
+
+@router.get("/stream/races/{race_id}", response_class=StreamingResponse)
+async def stream_race(
+    race_id: int,
+    last_event_id: Annotated[str | None, Header()] = None,
+) -> StreamingResponse:
+    """Stream result and qualifying changes of a race as Server-Sent Events.
+
+    Reconnecting clients send ``Last-Event-ID`` to receive the events they
+    missed; a ``reset`` event tells them to reload the race instead when
+    those events are no longer buffered or were sent by another worker.
+    """
+    subscription, backlog, missed = broker.subscribe(race_id, last_event_id)
+
+    async def events() -> AsyncGenerator[str]:
+        try:
+            yield f"retry: {RECONNECT_MILLISECONDS}\n\n"
+            if missed:
+                yield "event: reset\ndata: {}\n\n"
+            for event in backlog:
+                yield format_event(event)
+
+            # A client too slow to keep up is disconnected once its queue is
+            # drained and resumes from the buffer when it reconnects
+            while not (subscription.overflowed and subscription.queue.empty()):
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(),
+                        HEARTBEAT_SECONDS,
+                    )
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event)
+        finally:
+            broker.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -0,0 +1,134 @@
+"""Pre-rendered, gzip-compressed GET responses of frozen seasons.
+
+Snapshots are stored on disk under ``SNAPSHOT_DIR`` mirroring the API paths,
+e.g. ``results/race/18`` is stored as ``results/race/18.json.gz``, so every
+worker sharing the directory serves them without touching the database.
+"""
+
+import gzip
+import os
+import tempfile
+from pathlib import Path
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import FileResponse
+from sqlalchemy import ColumnElement
+from sqlmodel import Session, select
+
+from src.models import FrozenSeason, Race
+
+SNAPSHOT_DIR = Path(os.getenv("SNAPSHOT_DIR", "snapshots"))
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+def snapshot_path(key: str) -> Path:
+    """Get the file a snapshot is stored in."""
+    return SNAPSHOT_DIR / f"{key}.json.gz"
+
+
+def write_snapshot(key: str, body: bytes) -> None:
+    """Compress and atomically store a rendered response body."""
+    path = snapshot_path(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with tempfile.NamedTemporaryFile(
+        dir=path.parent,
+        suffix=".tmp",
+        delete=False,
+    ) as file:
+        file.write(gzip.compress(body, mtime=0))
+    Path(file.name).replace(path)
+
+
+def remove_snapshot(key: str) -> None:
+    """Remove a stored snapshot if present."""
+    snapshot_path(key).unlink(missing_ok=True)
+
+
+def snapshot_response(key: str, request: Request) -> Response | None:
+    """Serve a stored snapshot, or None if the key has not been frozen.
+
+    Clients accepting gzip get the file as is, without reading it into
+    memory; others get it decompressed.
+    """
+    path = snapshot_path(key)
+    if not path.is_file():
+        return None
+
+    headers = {
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL,
+        "Vary": "Accept-Encoding",
+    }
+    if "gzip" in request.headers.get("accept-encoding", ""):
+        return FileResponse(
+            path,
+            media_type="application/json",
+            headers={**headers, "Content-Encoding": "gzip"},
+        )
+    return Response(
+        content=gzip.decompress(path.read_bytes()),
+        media_type="application/json",
+        headers=headers,
+    )
+
+
+def ensure_season_writable(session: Session, year: int) -> None:
+    """Reject writes to the data of a frozen season."""
+    if session.get(FrozenSeason, year):
+        raise HTTPException(
+            status_code=409,
+            detail=f"Season {year} is frozen",
+        )
+
+
+def ensure_race_writable(session: Session, race_id: int) -> None:
+    """Reject writes to the data of a race in a frozen season."""
+    year = session.exec(
+        select(FrozenSeason.year)
+        .join(Race, Race.year == FrozenSeason.year)
+        .where(Race.race_id == race_id),
+    ).first()
+    if year is not None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Season {year} is frozen",
+        )
+
+
+def ensure_circuit_writable(session: Session, circuit_id: int) -> None:
+    """Reject writes to a circuit named in the weekends of a frozen season."""
+    year = session.exec(
+        select(FrozenSeason.year)
+        .join(Race, Race.year == FrozenSeason.year)
+        .where(Race.circuit_id == circuit_id),
+    ).first()
+    if year is not None:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Circuit is part of frozen season {year}",
+        )
+
+
+def season_writable(year: ColumnElement[int]) -> ColumnElement[bool]:
+    """Build the condition that a season is not frozen, for write guards."""
+    return year.not_in(select(FrozenSeason.year))
+
+
+def race_writable(race_id: ColumnElement[int]) -> ColumnElement[bool]:
+    """Build the condition that a race's season is not frozen."""
+    return race_id.not_in(
+        select(Race.race_id).join(
+            FrozenSeason,
+            FrozenSeason.year == Race.year,
+        ),
+    )
+
+
+def circuit_writable(circuit_id: ColumnElement[int]) -> ColumnElement[bool]:
+    """Build the condition that no race of a frozen season is at a circuit."""
+    return circuit_id.not_in(
+        select(Race.circuit_id).join(
+            FrozenSeason,
+            FrozenSeason.year == Race.year,
+        ),
+    )
@@ -0,0 +1,175 @@
+"""In-memory spatial index of the circuits for distance queries.
+
+Circuits are indexed as points on the unit sphere in a KD-tree. The
+straight-line (chord) distance between two such points grows with their
+great-circle distance, so the tree can prune by chord length and only the
+circuits it keeps need a haversine distance.
+"""
+
+import heapq
+import itertools
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+from sqlmodel import Session, select
+
+from src.cache import table_versions
+from src.models import Circuit, CircuitRead
+
+EARTH_RADIUS_KM = 6371.0088
+
+# Seconds the index is trusted, bounding staleness from circuit writes made
+# through other workers
+CIRCUIT_INDEX_TTL = float(os.getenv("CIRCUIT_INDEX_TTL", "60"))
+
+type Point = tuple[float, float, float]
+
+
+def to_unit_vector(lat: float, lng: float) -> Point:
+    """Convert a latitude and longitude in degrees to a unit vector."""
+    phi, lam = math.radians(lat), math.radians(lng)
+    return (
+        math.cos(phi) * math.cos(lam),
+        math.cos(phi) * math.sin(lam),
+        math.sin(phi),
+    )
+
+
+def chord_length(distance_km: float) -> float:
+    """Get the unit sphere chord spanning a great-circle distance."""
+    angle = min(distance_km / EARTH_RADIUS_KM, math.pi)
+    return 2 * math.sin(angle / 2)
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Get the great-circle distance between two points in kilometres."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    half_dphi = (phi2 - phi1) / 2
+    half_dlam = math.radians(lng2 - lng1) / 2
+    a = (
+        math.sin(half_dphi) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(half_dlam) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+@dataclass
+class _Node[T]:
+    point: Point
+    item: T
+    axis: int
+    left: "_Node[T] | None"
+    right: "_Node[T] | None"
+
+
+class KDTree[T]:
+    """Three-dimensional KD-tree answering nearest and radius queries."""
+
+    def __init__(self, entries: list[tuple[Point, T]]) -> None:
+        self.size = len(entries)
+        self._root = self._build(entries, 0)
+
+    def _build(
+        self,
+        entries: list[tuple[Point, T]],
+        depth: int,
+    ) -> _Node[T] | None:
+        """Build a balanced subtree split on the median of one axis."""
+        if not entries:
+            return None
+        axis = depth % 3
+        entries = sorted(entries, key=lambda entry: entry[0][axis])
+        median = len(entries) // 2
+        point, item = entries[median]
+        return _Node(
+            point,
+            item,
+            axis,
+            self._build(entries[:median], depth + 1),
+            self._build(entries[median + 1 :], depth + 1),
+        )
+
+    def nearest(
+        self,
+        point: Point,
+        k: int | None = None,
+        max_distance: float = math.inf,
+    ) -> list[tuple[float, T]]:
+        """Get the k nearest items within a distance, nearest first."""
+        limit = self.size if k is None else k
+        # Max-heap of (-distance, tiebreaker, item) of the best items so far
+        best: list[tuple[float, int, T]] = []
+        counter = itertools.count()
+
+        def bound() -> float:
+            if len(best) < limit:
+                return max_distance
+            return min(max_distance, -best[0][0])
+
+        def search(node: _Node[T] | None) -> None:
+            if node is None or limit == 0:
+                return
+            distance = math.dist(point, node.point)
+            if distance <= bound():
+                heapq.heappush(best, (-distance, next(counter), node.item))
+                if len(best) > limit:
+                    heapq.heappop(best)
+
+            offset = point[node.axis] - node.point[node.axis]
+            near, far = (
+                (node.left, node.right)
+                if offset < 0
+                else (node.right, node.left)
+            )
+            search(near)
+            if abs(offset) <= bound():
+                search(far)
+
+        search(self._root)
+        return [(-distance, item) for distance, _, item in sorted(best)[::-1]]
+
+
+class CircuitIndex:
+    """KD-tree of the circuits, rebuilt after circuit writes."""
+
+    def __init__(self) -> None:
+        self._tree: KDTree[CircuitRead] | None = None
+        self._version: tuple[int, ...] | None = None
+        self._expires = 0.0
+        self._lock = threading.Lock()
+
+    def get(self, session: Session) -> KDTree[CircuitRead]:
+        """Get the index, rebuilding it if the circuits have changed."""
+        with self._lock:
+            version = table_versions.get(Circuit.__tablename__)
+            if (
+                self._tree is None
+                or self._version != version
+                or self._expires <= time.monotonic()
+            ):
+                self._tree = self._build(session)
+                self._version = version
+                self._expires = time.monotonic() + CIRCUIT_INDEX_TTL
+            return self._tree
+
+    def _build(self, session: Session) -> KDTree[CircuitRead]:
+        """Index every circuit with coordinates."""
+        statement = select(Circuit).where(
+            Circuit.lat.is_not(None),
+            Circuit.lng.is_not(None),
+        )
+        return KDTree(
+            [
+                (
+                    to_unit_vector(circuit.lat, circuit.lng),
+                    CircuitRead.model_validate(circuit),
+                )
+                for circuit in session.exec(statement)
+            ],
+        )
+
+
+circuit_index = CircuitIndex()
@@ -0,0 +1,137 @@
+"""Typed Parquet staging copies of the source CSV files.
+
+Each CSV is parsed once with an explicit schema and written to a Parquet
+file named after the hash of the CSV's content. Later loads scan the
+Parquet file instead, so only the columns and rows a caller asks for are
+read, and a changed CSV is staged again automatically.
+"""
+
+import hashlib
+import os
+from pathlib import Path
+
+import polars as pl
+
+DATA_DIR = Path(os.getenv("DATA_DIR", Path(__file__).parent / "data"))
+STAGING_DIR = Path(os.getenv("STAGING_DIR", DATA_DIR / ".staging"))
+
+# Explicit column types; columns not listed here, such as dates and lap
+# times, are read as strings
+SCHEMAS: dict[str, dict[str, pl.DataType]] = {
+    "drivers": {
+        "driverId": pl.Int64(),
+        "number": pl.Int64(),
+    },
+    "circuits": {
+        "circuitId": pl.Int64(),
+        "lat": pl.Float64(),
+        "lng": pl.Float64(),
+        "alt": pl.Int64(),
+    },
+    "constructors": {
+        "constructorId": pl.Int64(),
+    },
+    "races": {
+        "raceId": pl.Int64(),
+        "year": pl.Int64(),
+        "round": pl.Int64(),
+        "circuitId": pl.Int64(),
+    },
+    "results": {
+        "resultId": pl.Int64(),
+        "raceId": pl.Int64(),
+        "driverId": pl.Int64(),
+        "constructorId": pl.Int64(),
+        "number": pl.Int64(),
+        "grid": pl.Int64(),
+        "position": pl.Int64(),
+        "positionOrder": pl.Int64(),
+        "points": pl.Float64(),
+        "laps": pl.Int64(),
+        "milliseconds": pl.Int64(),
+        "fastestLap": pl.Int64(),
+        "rank": pl.Int64(),
+        "statusId": pl.Int64(),
+    },
+    "sprint_results": {
+        "resultId": pl.Int64(),
+        "raceId": pl.Int64(),
+        "driverId": pl.Int64(),
+        "constructorId": pl.Int64(),
+        "number": pl.Int64(),
+        "grid": pl.Int64(),
+        "position": pl.Int64(),
+        "positionOrder": pl.Int64(),
+        "points": pl.Float64(),
+        "laps": pl.Int64(),
+        "milliseconds": pl.Int64(),
+        "fastestLap": pl.Int64(),
+        "statusId": pl.Int64(),
+    },
+    "qualifying": {
+        "qualifyId": pl.Int64(),
+        "raceId": pl.Int64(),
+        "driverId": pl.Int64(),
+        "constructorId": pl.Int64(),
+        "number": pl.Int64(),
+        "position": pl.Int64(),
+    },
+    "lap_times": {
+        "raceId": pl.Int64(),
+        "driverId": pl.Int64(),
+        "lap": pl.Int64(),
+        "position": pl.Int64(),
+        "milliseconds": pl.Int64(),
+    },
+    "pit_stops": {
+        "raceId": pl.Int64(),
+        "driverId": pl.Int64(),
+        "stop": pl.Int64(),
+        "lap": pl.Int64(),
+        "milliseconds": pl.Int64(),
+    },
+}
+
+
+def csv_available(name: str) -> bool:
+    """Check whether an optional CSV file was provided."""
+    return (DATA_DIR / f"{name}.csv").is_file()
+
+
+def file_hash(path: Path) -> str:
+    """Hash the content of a file."""
+    with path.open("rb") as file:
+        return hashlib.file_digest(file, "sha256").hexdigest()[:16]
+
+
+def stage_csv(name: str) -> Path:
+    """Get the Parquet copy of a CSV file, converting it if out of date."""
+    source = DATA_DIR / f"{name}.csv"
+    staged = STAGING_DIR / f"{name}-{file_hash(source)}.parquet"
+    if staged.exists():
+        return staged
+
+    STAGING_DIR.mkdir(parents=True, exist_ok=True)
+    frame = pl.read_csv(
+        source,
+        null_values=["\\N"],
+        infer_schema=False,
+        schema_overrides=SCHEMAS.get(name),
+    )
+    partial = staged.with_suffix(".tmp")
+    frame.write_parquet(partial)
+    partial.replace(staged)
+
+    for outdated in STAGING_DIR.glob(f"{name}-*.parquet"):
+        if outdated != staged:
+            outdated.unlink(missing_ok=True)
+    return staged
+
+
+def scan_table(name: str) -> pl.LazyFrame:
+    """Lazily scan a staged CSV file.
+
+    Selecting columns and filtering rows on the returned frame is pushed
+    down to the Parquet reader.
+    """
+    return pl.scan_parquet(stage_csv(name))
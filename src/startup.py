@@ -0,0 +1,67 @@
+"""Cold start instrumentation for the API workers."""
+
+import logging
+import time
+from dataclasses import dataclass
+
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from src import STARTED
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class StartupTimings:
+    """Seconds spent in each phase of a worker's cold start."""
+
+    import_seconds: float | None = None
+    startup_seconds: float | None = None
+    first_request_seconds: float | None = None
+
+    def as_milliseconds(self) -> dict[str, float | None]:
+        """Get the timings in milliseconds."""
+        return {
+            "import_ms": _to_milliseconds(self.import_seconds),
+            "startup_ms": _to_milliseconds(self.startup_seconds),
+            "first_request_ms": _to_milliseconds(
+                self.first_request_seconds,
+            ),
+        }
+
+
+timings = StartupTimings()
+
+
+def _to_milliseconds(seconds: float | None) -> float | None:
+    """Convert seconds to rounded milliseconds."""
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def mark_imported() -> None:
+    """Record the time spent importing the application."""
+    timings.import_seconds = time.perf_counter() - STARTED
+
+
+def mark_started() -> None:
+    """Record the time until the application is ready to serve."""
+    timings.startup_seconds = time.perf_counter() - STARTED
+    logger.info("Startup timings: %s", timings.as_milliseconds())
+
+
+class FirstRequestTimer:
+    """ASGI middleware recording when the first request has been served."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(
+        self,
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        await self.app(scope, receive, send)
+        if scope["type"] == "http" and timings.first_request_seconds is None:
+            timings.first_request_seconds = time.perf_counter() - STARTED
+            logger.info("Startup timings: %s", timings.as_milliseconds())
@@ -0,0 +1,70 @@
+"""JSON array responses streamed from a server-side cursor.
+
+The unbounded list routes, such as every result of a driver, would
+otherwise load each matching row as an ORM object, then a pydantic model
+and then one JSON string before sending a byte. ``stream_rows`` instead
+fetches ``STREAM_BATCH_SIZE`` rows at a time with ``yield_per`` and sends
+each batch as soon as it is serialized, so a worker holds about one batch
+however many rows match.
+
+The stream reads through its own session, opened on the same engine the
+request would read from, since the request's session is closed once the
+handler returns and before the body is sent.
+"""
+
+import itertools
+import os
+from collections.abc import Iterator
+from typing import Any
+
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, SQLModel
+from sqlmodel.sql.expression import SelectOfScalar
+
+from src.database import get_read_engine
+
+STREAM_BATCH_SIZE = int(os.getenv("STREAM_BATCH_SIZE", "500"))
+
+
+def json_array(
+    request: Request,
+    statement: SelectOfScalar[Any],
+    params: dict[str, Any],
+    read_model: type[SQLModel],
+) -> Iterator[bytes]:
+    """Run a statement and yield its rows as the chunks of a JSON array.
+
+    The statement runs before the opening bracket is yielded, so a failing
+    query raises before anything is sent.
+    """
+    with Session(get_read_engine(request)) as session:
+        result = session.exec(
+            statement.execution_options(yield_per=STREAM_BATCH_SIZE),
+            params=params,
+        )
+        yield b"["
+        separator = b""
+        for rows in result.partitions():
+            yield separator + b",".join(
+                read_model.model_validate(row).model_dump_json().encode()
+                for row in rows
+            )
+            separator = b","
+        yield b"]"
+
+
+def stream_rows(
+    request: Request,
+    statement: SelectOfScalar[Any],
+    params: dict[str, Any],
+    read_model: type[SQLModel],
+) -> StreamingResponse:
+    """Stream the rows of a statement as a JSON array of ``read_model``."""
+    chunks = json_array(request, statement, params, read_model)
+    # Run the query now, while errors still become a regular error response
+    opening = next(chunks)
+    return StreamingResponse(
+        itertools.chain((opening,), chunks),
+        media_type="application/json",
+    )
@@ -0,0 +1,27 @@
+"""Fixtures running the app against a temporary database."""
+
+import os
+import tempfile
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Set before src is imported, as its modules read their settings on import
+_directory = Path(tempfile.mkdtemp(prefix="f1-api-tests-"))
+os.environ["DATABASE_URL"] = f"sqlite:///{_directory / 'f1_data.db'}"
+os.environ["SNAPSHOT_DIR"] = str(_directory / "snapshots")
+os.environ.pop("RATE_LIMIT_DATABASE", None)
+# Tests of the rate limiter turn it on themselves
+os.environ["RATE_LIMIT_ENABLED"] = "0"
+
+
+@pytest.fixture(scope="session")
+def client() -> Iterator[TestClient]:
+    """Get a client of the app, started once for the whole session."""
+    # Imported once the environment above is set
+    from src.main import app  # noqa: PLC0415
+
+    with TestClient(app) as client:
+        yield client
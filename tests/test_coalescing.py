@@ -0,0 +1,80 @@
+"""Coalescing of identical concurrent GET requests."""
+
+import asyncio
+from pathlib import Path
+
+import httpx
+from starlette.requests import Request
+from starlette.responses import FileResponse, Response
+from starlette.types import Receive, Scope, Send
+
+from src.coalescing import RequestCoalescer
+
+PATH = "/api/v1/results/race/1"
+
+
+def file_app(path: Path, calls: list[Request]) -> RequestCoalescer:
+    """Serve a file slowly enough for concurrent requests to coalesce."""
+
+    async def app(scope: Scope, receive: Receive, send: Send) -> None:
+        calls.append(Request(scope))
+        await asyncio.sleep(0.05)
+        response: Response = FileResponse(path)
+        await response(scope, receive, send)
+
+    return RequestCoalescer(app)
+
+
+async def get_all(
+    app: RequestCoalescer,
+    headers: list[dict[str, str]],
+) -> list[httpx.Response]:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(
+        transport=transport,
+        base_url="http://test",
+    ) as client:
+        return await asyncio.gather(
+            *(client.get(PATH, headers=header) for header in headers),
+        )
+
+
+def test_identical_requests_share_one_response(tmp_path: Path) -> None:
+    path = tmp_path / "snapshot.json"
+    path.write_bytes(b'[{"result_id": 1}]')
+    calls: list[Request] = []
+
+    responses = asyncio.run(get_all(file_app(path, calls), [{}] * 4))
+
+    assert len(calls) == 1
+    assert [response.status_code for response in responses] == [200] * 4
+    assert {response.content for response in responses} == {path.read_bytes()}
+
+
+def test_range_response_is_not_shared(tmp_path: Path) -> None:
+    path = tmp_path / "snapshot.json"
+    path.write_bytes(b'[{"result_id": 1}, {"result_id": 2}]')
+    calls: list[Request] = []
+    headers = [{"range": "bytes=0-9"}, {}, {}, {}]
+
+    responses = asyncio.run(get_all(file_app(path, calls), headers))
+
+    assert responses[0].status_code == 206
+    assert responses[0].content == path.read_bytes()[:10]
+    for response in responses[1:]:
+        assert response.status_code == 200
+        assert "content-range" not in response.headers
+        assert response.content == path.read_bytes()
+    assert len(calls) == 2
+
+
+def test_partial_leader_is_not_replayed(tmp_path: Path) -> None:
+    path = tmp_path / "snapshot.json"
+    path.write_bytes(b'[{"result_id": 1}, {"result_id": 2}]')
+    calls: list[Request] = []
+    headers = [{"range": "bytes=0-9"}] * 2
+
+    responses = asyncio.run(get_all(file_app(path, calls), headers))
+
+    assert [response.status_code for response in responses] == [206, 206]
+    assert len(calls) == 2
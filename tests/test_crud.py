@@ -0,0 +1,31 @@
+"""Routes writing single rows by primary key."""
+
+from fastapi.testclient import TestClient
+
+DRIVER = {
+    "driver_ref": "prost",
+    "code": "PRO",
+    "forename": "Alain",
+    "surname": "Prost",
+    "nationality": "French",
+    "url": "http://en.wikipedia.org/wiki/Alain_Prost",
+}
+
+
+def test_put_replaces_and_patch_updates(client: TestClient) -> None:
+    driver_id = client.post("/api/v1/drivers", json=DRIVER).json()["driver_id"]
+    path = f"/api/v1/drivers/{driver_id}"
+
+    # A partial body is no longer accepted by PUT
+    assert client.put(path, json={"code": "APR"}).status_code == 422
+
+    updated = client.patch(path, json={"code": "APR"}).json()
+    assert updated["code"] == "APR"
+    assert updated["url"] == DRIVER["url"]
+
+    body = {key: value for key, value in DRIVER.items() if key != "url"}
+    replaced = client.put(path, json=body).json()
+    assert replaced["code"] == "PRO"
+    assert replaced["url"] is None
+
+    assert client.put("/api/v1/drivers/999999", json=body).status_code == 404
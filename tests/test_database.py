@@ -0,0 +1,45 @@
+"""Creating and upgrading the database schema."""
+
+from pathlib import Path
+
+import pytest
+from sqlmodel import create_engine
+
+from src import database
+from src.database import add_missing_columns, column_names, create_tables
+
+
+def test_column_added_by_another_worker_is_skipped(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    bind = create_engine(f"sqlite:///{tmp_path / 'f1_data.db'}")
+    create_tables(bind)
+    # This worker inspected the table before another one added the column
+    stale = [column_names(bind, "driver") - {"url"}]
+
+    def inspected(bind: object, table: str) -> set[str]:
+        if table == "driver" and stale:
+            return stale.pop()
+        return column_names(bind, table)
+
+    monkeypatch.setattr(database, "column_names", inspected)
+
+    add_missing_columns(bind)
+
+    assert not stale
+    assert "url" in column_names(bind, "driver")
+
+
+def test_missing_column_is_added(tmp_path: Path) -> None:
+    bind = create_engine(f"sqlite:///{tmp_path / 'f1_data.db'}")
+    create_tables(bind)
+    with bind.begin() as connection:
+        connection.exec_driver_sql("ALTER TABLE driver DROP COLUMN url")
+
+    add_missing_columns(bind)
+    # Running again, as a worker starting later does, changes nothing
+    add_missing_columns(bind)
+    create_tables(bind)
+
+    assert "url" in column_names(bind, "driver")
@@ -0,0 +1,51 @@
+"""Structured filters of the list routes."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+@pytest.mark.parametrize(
+    "query",
+    ["positon__lte=3", "positon=3", "race_id=18&positon__lte=3"],
+)
+def test_misspelled_filter_is_rejected(client: TestClient, query: str) -> None:
+    response = client.get(f"/api/v1/results?{query}")
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Unknown filter field: positon"}
+
+
+def test_cache_buster_is_ignored(client: TestClient) -> None:
+    response = client.get("/api/v1/results?race_id=18&_=1700000000")
+
+    assert response.status_code == 200
+
+
+def test_filter_without_index_is_rejected(client: TestClient) -> None:
+    response = client.get("/api/v1/results?position__lte=3")
+
+    assert response.status_code == 400
+    assert response.json()["detail"].startswith("Filters or order_by")
+
+
+# The examples given in the routes' docstrings and the README
+@pytest.mark.parametrize(
+    "path",
+    [
+        "/api/v1/circuits?country=Italy",
+        "/api/v1/constructors?nationality=British",
+        "/api/v1/drivers?nationality=German",
+        "/api/v1/races?year__gte=2010",
+        "/api/v1/races?order_by=-year",
+        "/api/v1/results?race_id=18&position__lte=3",
+        "/api/v1/results?constructor_id=9&position__lte=3&order_by=-points",
+        "/api/v1/results/wide?race_year=2021",
+        "/api/v1/qualifying?race_id=18&position__lte=3",
+        "/api/v1/qualifying?q3_ms__isnull=false&order_by=q3_ms",
+    ],
+)
+def test_documented_examples_are_accepted(
+    client: TestClient,
+    path: str,
+) -> None:
+    assert client.get(path).status_code == 200
@@ -0,0 +1,113 @@
+"""The lap time ingest writer."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from src import ingest
+from src.admission import ADMISSION_RETRY_AFTER
+from src.cache import memoized, race_rows, table_versions
+from src.database import engine
+from src.hotswap import DatabaseWatcher, reload_flag
+from src.ingest import IngestWriter, Record
+from src.models import Circuit, Driver, Race
+
+
+def flush(records: list[Record]) -> None:
+    """Write records through a writer's task."""
+    writer = IngestWriter(len(records), len(records), 0.05)
+
+    async def run() -> None:
+        writer.start()
+        assert writer.submit(records)
+        await writer.stop()
+
+    asyncio.run(run())
+
+
+def test_flush_keeps_other_races_cached(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ingest, "write_batch", lambda _rows: [])
+    computed: list[int] = []
+
+    def pace(race_id: int) -> int:
+        def compute() -> int:
+            computed.append(race_id)
+            return race_id
+
+        key = ("test-pace", race_id)
+        return memoized(key, (race_rows("lap_time", race_id),), compute)
+
+    pace(1)
+    pace(2)
+    flush([{"race_id": 2, "driver_id": 1, "lap": 1, "milliseconds": 90000}])
+    pace(1)
+    pace(2)
+
+    assert computed == [1, 2, 2]
+    assert table_versions.get(race_rows("lap_time", 1)) == (0,)
+
+
+def test_flush_waits_for_a_reload_to_finish(tmp_path: Path) -> None:
+    database = tmp_path / "f1_data.db"
+    database.touch()
+    watcher = DatabaseWatcher(f"sqlite:///{database}", 0.01)
+    flag = reload_flag(database)
+
+    async def run() -> None:
+        watcher.start()
+        flag.touch()
+        waiting = asyncio.create_task(watcher.writes_resumed())
+        await asyncio.sleep(0.05)
+        assert not waiting.done()
+        flag.unlink()
+        await asyncio.wait_for(waiting, 1)
+        await watcher.stop()
+
+    asyncio.run(run())
+
+
+def test_full_queue_answers_503(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    with Session(engine) as session:
+        circuit = Circuit(
+            circuit_ref="interlagos",
+            name="Interlagos",
+            location="Sao Paulo",
+            country="Brazil",
+        )
+        driver = Driver(
+            driver_ref="senna",
+            forename="Ayrton",
+            surname="Senna",
+            nationality="Brazilian",
+        )
+        session.add_all([circuit, driver])
+        session.flush()
+        race = Race(
+            year=1991,
+            round=2,
+            circuit_id=circuit.circuit_id,
+            name="Brazilian Grand Prix",
+        )
+        session.add(race)
+        session.commit()
+        record = {
+            "race_id": race.race_id,
+            "driver_id": driver.driver_id,
+            "lap": 1,
+            "time": "1:20.000",
+        }
+    monkeypatch.setattr(ingest.writer, "submit", lambda _records: False)
+
+    response = client.post("/api/v1/ingest/laps", json=[record])
+
+    assert response.status_code == 503
+    assert response.json() == {"detail": "Ingest queue is full, retry later"}
+    assert response.headers["retry-after"] == str(ADMISSION_RETRY_AFTER)
@@ -0,0 +1,34 @@
+"""Lap time routes."""
+
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from src.database import engine
+from src.models import LapTime
+
+RACE_ID = 7001
+
+
+def test_lap_times_are_streamed_in_lap_order(client: TestClient) -> None:
+    with Session(engine) as session:
+        for lap, driver_id, position in [(2, 2, 1), (1, 2, 2), (1, 1, 1)]:
+            session.add(
+                LapTime(
+                    race_id=RACE_ID,
+                    driver_id=driver_id,
+                    lap=lap,
+                    position=position,
+                    milliseconds=90000 + lap,
+                ),
+            )
+        session.commit()
+
+    response = client.get(f"/api/v1/laps/race/{RACE_ID}")
+    laps = [(row["lap"], row["driver_id"]) for row in response.json()]
+    assert response.status_code == 200
+    assert laps == [(1, 1), (1, 2), (2, 2)]
+
+    response = client.get(f"/api/v1/laps/race/{RACE_ID}?driver_id=2")
+    assert [row["lap"] for row in response.json()] == [1, 2]
+
+    assert client.get("/api/v1/laps/race/7002").json() == []
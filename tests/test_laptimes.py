@@ -0,0 +1,35 @@
+"""The Python and Polars lap time parsers must agree."""
+
+import polars as pl
+import pytest
+
+from src.laptimes import lap_time_ms, lap_time_ms_expr
+
+LAP_TIMES = [
+    ("1:23.456", 83456),
+    ("59.9", 59900),
+    ("83", 83000),
+    ("1:05", 65000),
+    (" 1:23.4 ", 83400),
+    ("1:23.4567", 83457),
+    ("\\N", None),
+    ("", None),
+    ("1:", None),
+    ("1:23:45.6", None),
+    (None, None),
+]
+
+# Exact halves of a millisecond must round the same way in both parsers
+HALF_MILLISECONDS = ["0.0005", "0.0015", "2:00.0125"]
+
+
+@pytest.mark.parametrize(("value", "expected"), LAP_TIMES)
+def test_lap_time_ms(value: str | None, expected: int | None) -> None:
+    assert lap_time_ms(value) == expected
+
+
+def test_lap_time_ms_expr_matches_python() -> None:
+    values = [value for value, _ in LAP_TIMES] + HALF_MILLISECONDS
+    frame = pl.DataFrame({"time": values}, schema={"time": pl.String})
+    parsed = frame.select(lap_time_ms_expr("time"))["time"].to_list()
+    assert parsed == [lap_time_ms(value) for value in values]
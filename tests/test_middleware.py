@@ -0,0 +1,90 @@
+"""Ordering of the middleware answering requests early."""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src import admission, ratelimit
+
+ORIGIN = "https://app.example.com"
+
+
+def test_rate_limited_response_has_cors_headers(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(
+        ratelimit,
+        "rate_limit_buckets",
+        ratelimit.LocalBuckets(10),
+    )
+    monkeypatch.setattr(
+        ratelimit,
+        "client_limits",
+        lambda _scope: ("cors-test", 0.001, 1.0),
+    )
+
+    allowed = client.get("/api/v1/drivers", headers={"origin": ORIGIN})
+    limited = client.get("/api/v1/drivers", headers={"origin": ORIGIN})
+
+    assert allowed.status_code == 200
+    assert limited.status_code == 429
+    assert limited.headers["access-control-allow-origin"] == ORIGIN
+    assert "retry-after" in limited.headers
+
+
+def test_preflight_is_not_rate_limited(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(ratelimit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(
+        ratelimit,
+        "rate_limit_buckets",
+        ratelimit.LocalBuckets(10),
+    )
+    monkeypatch.setattr(
+        ratelimit,
+        "client_limits",
+        lambda _scope: ("preflight-test", 0.001, 1.0),
+    )
+    headers = {
+        "origin": ORIGIN,
+        "access-control-request-method": "GET",
+    }
+
+    for _ in range(3):
+        response = client.options("/api/v1/drivers", headers=headers)
+        assert response.status_code == 200
+        assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert client.get("/api/v1/drivers").status_code == 200
+
+
+def test_shed_response_has_cors_headers(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    # No slots and no queue, so every request is shed
+    monkeypatch.setitem(admission.limiters, "cheap", admission.Limiter(0, 0))
+
+    response = client.get("/api/v1/drivers/1", headers={"origin": ORIGIN})
+
+    assert response.status_code == 503
+    assert response.headers["access-control-allow-origin"] == ORIGIN
+    assert "retry-after" in response.headers
+
+
+def test_preflight_is_not_admission_controlled(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setitem(admission.limiters, "cheap", admission.Limiter(0, 0))
+    headers = {
+        "origin": ORIGIN,
+        "access-control-request-method": "GET",
+    }
+
+    response = client.options("/api/v1/drivers/1", headers=headers)
+
+    assert response.status_code == 200
+    assert admission.route_class("OPTIONS", "/api/v1/drivers/1") is None
@@ -0,0 +1,47 @@
+"""Total counts of paginated lists."""
+
+import json
+
+import pytest
+from sqlmodel import Session, SQLModel, create_engine
+
+from src.filters import QueryFilters
+from src.models import Result
+from src.pagination import approximate_count, exact_count, plan_rows
+
+PLAN = [{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 26080}}]
+
+
+@pytest.mark.parametrize(
+    "plan",
+    [PLAN, json.dumps(PLAN), json.dumps(PLAN).encode()],
+    ids=["decoded", "text", "bytes"],
+)
+def test_plan_rows(plan: object) -> None:
+    assert plan_rows(plan) == 26080
+
+
+def test_approximate_count_on_sqlite_is_exact() -> None:
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine, tables=[Result.__table__])
+    with Session(engine) as session:
+        # Deleted rows leave gaps in the keys
+        for result_id in (1, 5, 900):
+            session.add(
+                Result(
+                    result_id=result_id,
+                    race_id=1,
+                    driver_id=result_id,
+                    constructor_id=1,
+                    position_text="1",
+                    position_order=1,
+                    points=0,
+                    laps=0,
+                    status_id=1,
+                ),
+            )
+        session.commit()
+
+        filters = QueryFilters()
+        assert approximate_count(session, Result, filters) == 3
+        assert exact_count(session, Result, filters) == 3
@@ -0,0 +1,37 @@
+"""Token buckets of the rate limiter."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from src import ratelimit
+from src.ratelimit import FULL_AFTER, SharedBuckets
+
+
+def test_shared_buckets_are_pruned_once_full(
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    now = 1_000_000.0
+    monkeypatch.setattr(ratelimit.time, "time", lambda: now)
+    buckets = SharedBuckets(str(tmp_path / "ratelimit.db"))
+
+    async def take(client: str) -> tuple[bool, float]:
+        return await buckets.take(client, 1, 10, 100)
+
+    interval = ratelimit.RATE_LIMIT_PRUNE_INTERVAL
+    assert interval > FULL_AFTER
+
+    asyncio.run(take("ip:192.0.2.1"))
+    now += interval - FULL_AFTER / 2
+    asyncio.run(take("ip:192.0.2.2"))
+    assert len(buckets) == 2
+
+    now += FULL_AFTER / 2
+    allowed, tokens = asyncio.run(take("ip:192.0.2.3"))
+
+    # Only the bucket idle for longer than a full refill is dropped
+    assert len(buckets) == 2
+    assert allowed
+    assert tokens == 99
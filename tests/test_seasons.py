@@ -0,0 +1,110 @@
+"""Freezing completed seasons into snapshots."""
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from src.database import engine
+from src.routers import results, seasons
+
+YEAR = 1999
+
+
+@pytest.fixture(scope="module")
+def result_id(client: TestClient) -> int:
+    """Create a race of a completed season with one result."""
+    circuit = client.post(
+        "/api/v1/circuits",
+        json={
+            "circuit_ref": "suzuka",
+            "name": "Suzuka",
+            "location": "Suzuka",
+            "country": "Japan",
+        },
+    ).json()
+    driver = client.post(
+        "/api/v1/drivers",
+        json={
+            "driver_ref": "hakkinen",
+            "forename": "Mika",
+            "surname": "Hakkinen",
+            "nationality": "Finnish",
+        },
+    ).json()
+    constructor = client.post(
+        "/api/v1/constructors",
+        json={
+            "constructor_ref": "mclaren",
+            "name": "McLaren",
+            "nationality": "British",
+        },
+    ).json()
+    race = client.post(
+        "/api/v1/races",
+        json={
+            "year": YEAR,
+            "round": 16,
+            "circuit_id": circuit["circuit_id"],
+            "name": "Japanese Grand Prix",
+        },
+    ).json()
+    result = client.post(
+        "/api/v1/results",
+        json={
+            "race_id": race["race_id"],
+            "driver_id": driver["driver_id"],
+            "constructor_id": constructor["constructor_id"],
+            "position": 1,
+            "position_text": "1",
+            "position_order": 1,
+            "points": 10,
+            "laps": 53,
+            "status_id": 1,
+        },
+    ).json()
+    return result["result_id"]
+
+
+def test_writes_are_rejected_while_rendering(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    result_id: int,
+) -> None:
+    write_season_snapshots = seasons.write_season_snapshots
+    rejected: list[int] = []
+
+    def render(session: Session, races: list) -> None:
+        with Session(engine) as writer, pytest.raises(HTTPException) as error:
+            results.crud.update(writer, result_id, {"points": 0})
+        rejected.append(error.value.status_code)
+        write_season_snapshots(session, races)
+
+    monkeypatch.setattr(seasons, "write_season_snapshots", render)
+
+    assert client.post(f"/api/v1/seasons/{YEAR}/freeze").status_code == 200
+    assert rejected == [409]
+    client.delete(f"/api/v1/seasons/{YEAR}/freeze")
+
+
+def test_failed_render_rolls_back_the_freeze(
+    client: TestClient,
+    monkeypatch: pytest.MonkeyPatch,
+    result_id: int,
+) -> None:
+    def render(_session: Session, _races: list) -> None:
+        msg = "No space left on device"
+        raise OSError(msg)
+
+    monkeypatch.setattr(seasons, "write_season_snapshots", render)
+
+    with pytest.raises(OSError, match="No space"):
+        client.post(f"/api/v1/seasons/{YEAR}/freeze")
+
+    frozen = client.get("/api/v1/seasons/frozen").json()
+    assert YEAR not in [season["year"] for season in frozen]
+    response = client.patch(
+        f"/api/v1/results/{result_id}",
+        json={"points": 9},
+    )
+    assert response.status_code == 200